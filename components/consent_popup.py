@@ -13,9 +13,18 @@ class ConsentPopup:
     def __init__(self, driver):
         self.driver = driver
 
+    def is_shown(self, timeout=5):
+        """True if the consent button shows up within ``timeout`` seconds."""
+        try:
+            EC.wait_for_element_visible(self.driver, self.CONSENT_BTN, timeout)
+        except TimeoutException:
+            return False
+        return True
+
     def accept(self, timeout=5):
-        """Click consent if present; ignore if not found."""
+        """Click consent if present; ignore if not found. True if clicked."""
         try:
             EC.click_element(self.driver, self.CONSENT_BTN, timeout)
         except TimeoutException:
-            pass
+            return False
+        return True
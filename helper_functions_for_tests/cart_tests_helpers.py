@@ -1,26 +1,38 @@
 import os
 from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Optional
 
 from pages.cart import CartPage
 from pages.main_page import FeaturesItems, NavMenu
 from pages.product_details_page import ProductDetailsPage
+from utils.api_requests import add_to_cart
+from utils.login_session import browser_cookies, inject_cookies, response_cookies
 
 
 @dataclass
 class ProductInfo:
     name: str
     price: int
-    idx: int = 0
+    idx: Optional[int] = 0  # card position on the main page, None if not listed
     qty: int = 1
 
 
-def add_from_main(driver, idx=0, close_modal=True) -> ProductInfo:
+def add_from_main(driver, idx=0, close_modal=True, catalog=None) -> ProductInfo:
     """
     Add a product from main page (FeaturesItems) and return its info.
+    With a ProductCatalog, name and price come from the API by the card's
+    product id instead of being read from the page (unless the card has none).
     """
     features = FeaturesItems(driver)
-    prod_name = features.get_product_name(idx)
-    price = features.get_product_price(idx)
+    product = None
+    if catalog is not None:
+        product = catalog.get(features.get_product_id(idx))
+    if product is not None:
+        prod_name, price = product.name, product.price
+    else:
+        prod_name = features.get_product_name(idx)
+        price = features.get_product_price(idx)
     features.add_to_cart_by_hover(index=idx, close_modal=close_modal)
     return ProductInfo(name=prod_name, price=price, idx=idx, qty=1)
 
@@ -43,6 +55,45 @@ def add_from_details(
     return ProductInfo(name=prod_name, price=price, idx=idx, qty=qty)
 
 
+def seed_cart(driver, catalog, products) -> list[ProductInfo]:
+    """
+    Put products into the browser session's cart over HTTP, without the UI.
+    products: list of (product_id, qty); name and price come from the catalog.
+    The driver must be on the main page: each product's idx is the position
+    of the card linking to its details page.
+    For tests of the cart page itself; adding from the pages is tested with
+    add_from_main / add_from_details.
+    """
+    address = os.environ.get("ADDRESS")
+    cookies = browser_cookies(driver, address)
+    cards = FeaturesItems(driver).records()
+    positions = {
+        card["id"]: idx for idx, card in enumerate(cards) if card["id"] is not None
+    }
+    seeded, new_cookies = [], []
+    for product_id, qty in products:
+        resp = add_to_cart(product_id, qty, cookies)
+        assert (
+            resp.status_code == HTTPStatus.OK
+        ), f"Adding product {product_id} failed: HTTP {resp.status_code}"
+        # A browser without a session yet gets one with the first product
+        for cookie in response_cookies(resp):
+            cookies[cookie["name"]] = cookie["value"]
+            new_cookies.append(cookie)
+        product = catalog.get(product_id)
+        seeded.append(
+            ProductInfo(
+                name=product.name,
+                price=product.price,
+                idx=positions.get(product.id),
+                qty=qty,
+            )
+        )
+    if new_cookies:
+        inject_cookies(driver, address, new_cookies)
+    return seeded
+
+
 def open_cart(driver):
     NavMenu.click_nav_btn(driver, NavMenu.CART_BTN)
     return CartPage(driver)
@@ -57,41 +108,41 @@ def norm(string):
 
 
 def assert_cart_row_names(cart: CartPage, expected_names):
-    rows = cart.get_all_rows()
-    cart_names = {norm(r.name()) for r in rows}
+    rows = cart.get_row_records()
+    cart_names = {norm(r["name"]) for r in rows}
     for name in expected_names:
         assert norm(name) in cart_names, f"Product {name} not found in cart"
 
 
 def assert_cart_row_quantities(cart: CartPage, products):
-    rows = cart.get_all_rows()
+    rows = cart.get_row_records()
     for name, qty in products:
-        row = next((r for r in rows if norm(r.name()) == norm(name)), None)
+        row = next((r for r in rows if norm(r["name"]) == norm(name)), None)
         assert row, f"Product {name} not found in cart"
         assert (
-            row.quantity() == qty
-        ), f"Expected quantity {qty} for {name}, got {row.quantity()}"
+            row["quantity"] == qty
+        ), f"Expected quantity {qty} for {name}, got {row['quantity']}"
 
 
 def assert_cart_row_prices(cart: CartPage, products):
-    rows = cart.get_all_rows()
+    rows = cart.get_row_records()
     for name, _, price in products:
-        row = next((r for r in rows if norm(r.name()) == norm(name)), None)
+        row = next((r for r in rows if norm(r["name"]) == norm(name)), None)
         assert row, f"Product {name} not found in cart"
         assert (
-            row.price() == price
-        ), f"Expected price {price} for {name}, got {row.price()}"
+            row["price"] == price
+        ), f"Expected price {price} for {name}, got {row['price']}"
 
 
 def assert_cart_row_line_totals(cart: CartPage, products):
-    rows = cart.get_all_rows()
+    rows = cart.get_row_records()
     for name, qty, price in products:
-        row = next((r for r in rows if norm(r.name()) == norm(name)), None)
+        row = next((r for r in rows if norm(r["name"]) == norm(name)), None)
         assert row, f"Product {name} not found in cart"
         expected_line_total = qty * price
         assert (
-            row.total() == expected_line_total
-        ), f"Line total mismatch for {name}: {row.total()} != {price} * {qty}"
+            row["total"] == expected_line_total
+        ), f"Line total mismatch for {name}: {row['total']} != {price} * {qty}"
 
 
 def assert_cart_total(cart: CartPage, products):
@@ -102,12 +153,28 @@ def assert_cart_total(cart: CartPage, products):
     ), f"Cart total mismatch: {actual_total} != {expected_total}"
 
 
-def assert_cart_all(cart: CartPage, products):
+def assert_cart_prices_match_catalog(cart: CartPage, catalog):
+    """Cross-check every cart row against the API product list by product id."""
+    for row in cart.get_row_records():
+        product = catalog.get(row["id"])
+        assert product is not None, f"Cart row {row['name']} has no product link"
+        assert norm(row["name"]) == norm(
+            product.name
+        ), f"Cart shows {row['name']} for product {product.id}, API says {product.name}"
+        assert (
+            row["price"] == product.price
+        ), f"Cart price {row['price']} for {product.name}, API says {product.price}"
+
+
+def assert_cart_all(cart: CartPage, products, catalog=None):
     """
     products: list of (name, qty, price)
+    catalog: optional ProductCatalog to cross-check rows against the API
     """
     assert_cart_row_names(cart, [name for name, _, _ in products])
     assert_cart_row_quantities(cart, [(name, qty) for name, qty, _ in products])
     assert_cart_row_prices(cart, products)
     assert_cart_row_line_totals(cart, products)
     assert_cart_total(cart, products)
+    if catalog is not None:
+        assert_cart_prices_match_catalog(cart, catalog)
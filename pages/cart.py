@@ -4,6 +4,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver, WebElement
 
 from utils.expected_conditions import EC
+from utils.product_catalog import parse_price
 
 
 @dataclass
@@ -25,16 +26,14 @@ class ProductRow:
         return EC.find_element(self.row_element, self.CATEGORY).text.strip()
 
     def price(self) -> int:
-        txt = EC.find_element(self.row_element, self.PRICE).text
-        return int(txt.replace("Rs. ", "").replace(",", "").strip())
+        return parse_price(EC.find_element(self.row_element, self.PRICE).text)
 
     def quantity(self) -> int:
         txt = EC.find_element(self.row_element, self.QUANTITY).text.strip()
         return int(txt)
 
     def total(self) -> int:
-        txt = EC.find_element(self.row_element, self.TOTAL).text
-        return int(txt.replace("Rs. ", "").replace(",", "").strip())
+        return parse_price(EC.find_element(self.row_element, self.TOTAL).text)
 
     def delete(self):
         EC.find_element(self.row_element, self.DELETE_BTN).click()
@@ -76,14 +75,38 @@ class CartPage:
     def get_all_rows(self) -> list[ProductRow]:
         return [ProductRow(row) for row in self._rows()]
 
+    def get_row_records(self) -> list[dict]:
+        """id, name, price, quantity and total of every row, in one browser call."""
+        rows = EC.extract_records(
+            self._table(),
+            self.ROWS,
+            {
+                "id": "@id",
+                "name": (ProductRow.NAME, "text"),
+                "price": (ProductRow.PRICE, "text"),
+                "quantity": (ProductRow.QUANTITY, "text"),
+                "total": (ProductRow.TOTAL, "text"),
+            },
+        )
+        return [
+            {
+                "id": int(row["id"].replace("product-", "")),
+                "name": row["name"],
+                "price": parse_price(row["price"]),
+                "quantity": int(row["quantity"]),
+                "total": parse_price(row["total"]),
+            }
+            for row in rows
+        ]
+
     def get_product_ids(self) -> list[int]:
-        return [row.id() for row in self.get_all_rows()]
+        return [row["id"] for row in self.get_row_records()]
 
     def assert_all_line_totals(self):
-        for row in self.get_all_rows():
+        for row in self.get_row_records():
             assert (
-                row.total() == row.price() * row.quantity()
-            ), f"Line total mismatch for id={row.id()}: {row.total()} != {row.price()} * {row.quantity()}"
+                row["total"] == row["price"] * row["quantity"]
+            ), f"Line total mismatch for id={row['id']}: {row['total']} != {row['price']} * {row['quantity']}"
 
     def get_total_cart_value(self) -> int:
-        return sum(row.total() for row in self.get_all_rows())
+        return sum(row["total"] for row in self.get_row_records())
@@ -1,9 +1,12 @@
+from urllib.parse import urljoin
+
 from selenium.webdriver.common.by import By
 
 from components.consent_popup import ConsentPopup
 from pages.main_page import NavMenu
 from utils.basefunctions import BaseFunctions
 from utils.expected_conditions import EC
+from utils.login_session import get_login_cache, inject_cookies
 
 
 class LoginPage(BaseFunctions):
@@ -34,6 +37,27 @@ class LoginPage(BaseFunctions):
         EC.click_element(self.driver, self.LOGIN_BUTTON)
         self.is_logged_in()
 
+    def login_via_http(self, email, password):
+        """Open the home page logged in, without the login form.
+
+        For tests that need a logged-in user but do not test logging in: the
+        session comes from an HTTP login (cached per user) and is injected as
+        cookies. Use :meth:`load` and :meth:`login` to test the form itself.
+        """
+        cache = get_login_cache()
+        home = urljoin(self.URL, "/")
+        for refresh in (False, True):
+            inject_cookies(
+                self.driver, self.URL, cache.cookies(self.URL, email, password, refresh)
+            )
+            self.driver.get(home)
+            ConsentPopup(self.driver).accept()  # Handles the popup if present
+            if EC.is_displayed(self.driver, NavMenu.LOGOUT_BTN):
+                break
+            # The server dropped the cached session (logout, deleted account)
+            cache.forget(email, rejected=not refresh)
+        self.is_logged_in()
+
     def signup(self, name, email):
         """Fill signup form and submit."""
         EC.fill_element(self.driver, self.SIGNUP_NAME_INPUT, name)
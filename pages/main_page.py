@@ -2,6 +2,7 @@ from selenium.webdriver.common.by import By
 
 from components.modal_shopping import AddToCartModal
 from utils.expected_conditions import EC
+from utils.product_catalog import parse_price
 
 
 class MainPage:
@@ -94,6 +95,31 @@ class FeaturesItems:
         AddToCartModal(self.driver).wait_until_visible()
         AddToCartModal(self.driver).click_view_cart()
 
+    def records(self):
+        """Name, price, details URL and product id of every card.
+
+        Read in one browser call instead of several per card; for bulk reads.
+        The get_product_* getters read a single card.
+        """
+        cards = EC.extract_records(
+            self.component,
+            self.PRODUCT_CARDS,
+            {
+                "name": (self.PRODUCT_NAME, "text"),
+                "price": (self.PRODUCT_PRICE, "text"),
+                "url": (self.VIEW_PRODUCT_BTN, "@href"),
+            },
+        )
+        return [
+            {
+                "name": card["name"],
+                "price": parse_price(card["price"]),
+                "url": card["url"],
+                "id": _product_id(card["url"]),
+            }
+            for card in cards
+        ]
+
     def get_product_name(self, index=0):
         return EC.find_element(self.card(index), self.PRODUCT_NAME).text.strip()
 
@@ -102,12 +128,21 @@ class FeaturesItems:
             "href"
         )
 
+    def get_product_id(self, index=0):
+        """Product id from the card's details link, e.g. ".../product_details/1" -> 1"""
+        return _product_id(self.get_product_detail_url(index))
+
     def get_product_price(self, index=0):
         """
         Returns product price as int, stripping 'Rs. ' and commas.
         Example: "Rs. 1,000" -> 1000
         """
         price_text = EC.find_element(self.card(index), self.PRODUCT_PRICE).text
-        # Remove currency and commas, keep only digits
-        price = price_text.replace("Rs. ", "").replace(",", "").strip()
-        return int(price)
+        return parse_price(price_text)
+
+
+def _product_id(url):
+    """Id at the end of a details URL; None for a card without a link."""
+    if not url:
+        return None
+    return int(url.rstrip("/").rsplit("/", 1)[-1])
@@ -101,7 +101,7 @@ docker compose build test-runner
 
 PYTEST_ARGS=(-v --color=yes)
 [ -n "$MARKER" ] && PYTEST_ARGS+=( -m "$MARKER" )
-PYTEST_ARGS+=( -n "$WORKERS" --reruns "$RERUNS" --html=tests/artifacts/report.html --self-contained-html )
+PYTEST_ARGS+=( -n "$WORKERS" --xdist-schedule affinity --reruns "$RERUNS" --html=tests/artifacts/report.html --self-contained-html )
 
 echo "🧪 Running pytest ($BROWSER, headless=$HEADLESS, VNC=$VNC, workers=$WORKERS, reruns=$RERUNS, env=$ENV_TYPE)…"
 docker compose run --rm --no-deps \
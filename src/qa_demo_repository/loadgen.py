@@ -0,0 +1,331 @@
+# src/qa_demo_repository/loadgen.py
+"""Load test ``ADDRESS`` with the wrappers from ``utils/api_requests.py``.
+
+A scenario is a JSON file with a weighted mix of wrapper calls:
+
+    {
+      "rps": 20, "ramp_up": 10, "duration": 60, "concurrency": 32,
+      "users": 4,
+      "steps": [
+        {"call": "get_all_products", "weight": 3},
+        {"call": "search_product", "args": ["top"], "weight": 2},
+        {"call": "verify_login_valid", "args": ["$email", "$password"]}
+      ]
+    }
+
+With ``rps`` the scheduler is open-loop: arrivals follow the target rate
+(ramped up linearly) no matter how slow responses are, and latency is counted
+from the intended start, so a saturated server shows up as queueing delay
+instead of silently lowering the load. Without ``rps`` it is closed-loop:
+``concurrency`` virtual users call back to back, started over ``ramp_up``.
+
+``"users": N`` creates N accounts first (deleted afterwards); ``$user``,
+``$email`` and ``$password`` in ``args`` pick one of them at random.
+A step succeeds when the body's ``responseCode`` equals ``expect`` (200).
+
+    poetry run loadtest loadtests/api_mix.json --rps 50 --duration 120
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Upper bounds (ms) of the histogram buckets
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, math.inf)
+
+
+@dataclass
+class Step:
+    call: str
+    func: Callable
+    args: list
+    weight: float = 1.0
+    expect: int = 200
+
+
+@dataclass
+class Scenario:
+    steps: List[Step]
+    rps: Optional[float] = None
+    concurrency: int = 16
+    ramp_up: float = 0.0
+    duration: float = 60.0
+    users: int = 0
+
+
+@dataclass
+class CallStats:
+    latencies: List[float] = field(default_factory=list)
+    codes: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, CallStats] = {}
+        self.queue_delays: List[float] = []
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    def add(self, step: Step, latency: float, code: str, ok: bool, delay: float):
+        with self._lock:
+            stats = self.calls.setdefault(step.call, CallStats())
+            stats.latencies.append(latency)
+            stats.codes[code] += 1
+            stats.errors += not ok
+            self.queue_delays.append(delay)
+
+
+def _outcome(response) -> str:
+    # The site answers 200 and puts the real status in the body
+    if response.status_code != 200:
+        return f"HTTP {response.status_code}"
+    try:
+        return str(response.json().get("responseCode"))
+    except ValueError:
+        return "invalid JSON"
+
+
+def load_scenario(path: str, api_requests) -> Scenario:
+    data = json.loads(Path(path).read_text())
+    steps = []
+    for raw in data.pop("steps"):
+        func = getattr(api_requests, raw["call"], None)
+        if raw["call"].startswith("_") or not callable(func):
+            raise SystemExit(f"Unknown api_requests function: {raw['call']!r}")
+        steps.append(
+            Step(
+                raw["call"],
+                func,
+                raw.get("args", []),
+                raw.get("weight", 1.0),
+                raw.get("expect", 200),
+            )
+        )
+    return Scenario(steps=steps, **data)
+
+
+def _bind(args: list, users: List[dict]) -> list:
+    if not users:
+        return args
+    user = random.choice(users)
+    values = {"$user": user, "$email": user["email"], "$password": user["password"]}
+    return [values.get(a, a) if isinstance(a, str) else a for a in args]
+
+
+def _arrival_time(k: int, rps: float, ramp_up: float) -> float:
+    """Start offset of the k-th arrival for a rate ramped linearly to ``rps``."""
+
+    ramp_arrivals = rps * ramp_up / 2
+    if k < ramp_arrivals:
+        return math.sqrt(2 * k * ramp_up / rps)
+    return ramp_up + (k - ramp_arrivals) / rps
+
+
+class LoadGenerator:
+    def __init__(self, scenario: Scenario):
+        self.scenario = scenario
+        self.results = Results()
+        self.users: List[dict] = []
+        self._stop = threading.Event()
+        self._weights = [s.weight for s in scenario.steps]
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def _call(self, intended: float) -> None:
+        step = random.choices(self.scenario.steps, self._weights)[0]
+        start = time.monotonic()
+        try:
+            code = _outcome(step.func(*_bind(step.args, self.users)))
+        except Exception as e:  # keep going, count it in the breakdown
+            code = type(e).__name__
+        end = time.monotonic()
+        ok = code == str(step.expect)
+        # Open loop: measure from the intended start (no coordinated omission)
+        self.results.add(step, end - intended, code, ok, start - intended)
+
+    def _open_loop(self, deadline: float) -> None:
+        sc = self.scenario
+        start = time.monotonic()
+        with ThreadPoolExecutor(sc.concurrency, "loadgen") as pool:
+            for k in range(sys.maxsize):
+                intended = start + _arrival_time(k, sc.rps, sc.ramp_up)
+                if intended >= deadline or self._stop.wait(
+                    max(intended - time.monotonic(), 0)
+                ):
+                    break
+                pool.submit(self._call, intended)
+            if self._stop.is_set():
+                pool.shutdown(cancel_futures=True)
+
+    def _closed_loop(self, deadline: float) -> None:
+        sc = self.scenario
+
+        def virtual_user(delay: float):
+            if self._stop.wait(delay):
+                return
+            while time.monotonic() < deadline and not self._stop.is_set():
+                self._call(time.monotonic())
+
+        threads = [
+            threading.Thread(
+                target=virtual_user, args=(sc.ramp_up * i / sc.concurrency,)
+            )
+            for i in range(sc.concurrency)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def run(self, create_accounts, delete_accounts, make_users) -> Results:
+        sc = self.scenario
+        if sc.users:
+            users = make_users(sc.users)
+            self.users = [u for u, r in zip(users, create_accounts(users)) if r.ok]
+            print(f"Created {len(self.users)}/{sc.users} accounts")
+        self.results = Results()
+        deadline = time.monotonic() + sc.duration
+        try:
+            if sc.rps:
+                self._open_loop(deadline)
+            else:
+                self._closed_loop(deadline)
+        finally:
+            self.results.finished = time.monotonic()
+            delete_accounts(self.users)
+        return self.results
+
+
+# --- Reporting -------------------------------------------------------------------
+def histogram(latencies: List[float], width: int = 40) -> List[str]:
+    counts = Counter()
+    for latency in latencies:
+        ms = latency * 1000
+        counts[next(b for b in BUCKETS_MS if ms <= b)] += 1
+    peak = max(counts.values(), default=1)
+    lines = []
+    for bucket in BUCKETS_MS:
+        label = "inf" if bucket == math.inf else f"{bucket:g}"
+        bar = "#" * math.ceil(width * counts[bucket] / peak)
+        lines.append(f"  <= {label:>6} ms {counts[bucket]:>8} {bar}")
+    return lines
+
+
+def summary(results: Results, percentile) -> dict:
+    elapsed = (results.finished or time.monotonic()) - results.started
+    calls = {}
+    for name, stats in sorted(results.calls.items()):
+        ms = [v * 1000 for v in stats.latencies]
+        calls[name] = {
+            "count": len(ms),
+            "errors": stats.errors,
+            "p50_ms": round(percentile(ms, 50), 1),
+            "p95_ms": round(percentile(ms, 95), 1),
+            "p99_ms": round(percentile(ms, 99), 1),
+            "max_ms": round(max(ms, default=0), 1),
+            "response_codes": dict(stats.codes.most_common()),
+        }
+    total = sum(c["count"] for c in calls.values())
+    delays = [d * 1000 for d in results.queue_delays]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "errors": sum(c["errors"] for c in calls.values()),
+        "queue_delay_p95_ms": round(percentile(delays, 95), 1),
+        "calls": calls,
+    }
+
+
+def print_report(results: Results, report: dict) -> None:
+    print(
+        f"\n\033[96m▶ {report['requests']} requests in {report['elapsed_s']}s "
+        f"({report['throughput_rps']} req/s), {report['errors']} errors, "
+        f"queue delay p95 {report['queue_delay_p95_ms']}ms\033[0m"
+    )
+    for name, c in report["calls"].items():
+        print(
+            f"\n{name}: {c['count']} calls, {c['errors']} errors, p50 {c['p50_ms']}ms "
+            f"p95 {c['p95_ms']}ms p99 {c['p99_ms']}ms max {c['max_ms']}ms"
+        )
+        codes = ", ".join(f"{k}: {v}" for k, v in c["response_codes"].items())
+        print(f"  responseCode: {codes}")
+        print("\n".join(histogram(results.calls[name].latencies)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("scenario", help="scenario JSON file")
+    parser.add_argument("--address", help="target (default: ADDRESS env var)")
+    parser.add_argument("--rps", type=float, help="open-loop arrival rate")
+    parser.add_argument("--concurrency", type=int, help="max requests in flight")
+    parser.add_argument("--ramp-up", type=float, help="seconds to reach full load")
+    parser.add_argument("--duration", type=float, help="seconds to generate load")
+    parser.add_argument("--json-out", help="also write the summary to this file")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="let steps that pass cache=True (args: [true]) use the response cache",
+    )
+    args = parser.parse_args(argv)
+
+    if args.address:
+        os.environ["ADDRESS"] = args.address
+    if not os.environ.get("ADDRESS"):
+        raise SystemExit("Set ADDRESS or pass --address")
+    if not args.use_cache:
+        os.environ["API_CACHE"] = "false"
+    os.environ["API_CASSETTE"] = "off"
+    os.environ["API_LATENCY"] = "false"  # the generator keeps its own numbers
+    # Measure the server, not the retry policy: errors are reported as they come
+    os.environ["API_RETRIES"] = "1"
+    os.environ["API_BREAKER"] = "false"
+    # The console script runs from the virtualenv; the wrappers live in the repo
+    sys.path.insert(0, str(REPO_ROOT))
+    from utils import api_requests
+    from utils.api_latency import percentile
+    from utils.payloads import get_payload_factory
+
+    scenario = load_scenario(args.scenario, api_requests)
+    for name in ("rps", "concurrency", "ramp_up", "duration"):
+        if getattr(args, name) is not None:
+            setattr(scenario, name, getattr(args, name))
+    # One keep-alive connection per in-flight request
+    os.environ.setdefault("HTTP_POOL_MAXSIZE", str(scenario.concurrency))
+    random.seed(args.seed)
+
+    mode = f"{scenario.rps} req/s" if scenario.rps else "closed loop"
+    print(
+        f"\033[96m▶ {mode}, concurrency {scenario.concurrency}, ramp-up "
+        f"{scenario.ramp_up}s, {scenario.duration}s against "
+        f"{os.environ['ADDRESS']}\033[0m"
+    )
+    generator = LoadGenerator(scenario)
+    signal.signal(signal.SIGINT, generator.stop)
+    results = generator.run(
+        api_requests.create_accounts,
+        api_requests.delete_accounts,
+        get_payload_factory().users,
+    )
+    report = summary(results, percentile)
+    print_report(results, report)
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=1))
+    sys.exit(1 if report["errors"] else 0)
@@ -0,0 +1,386 @@
+# src/qa_demo_repository/stub_server.py
+"""Local stand-in for the automationexercise.com ``/api`` endpoints.
+
+Implements every endpoint wrapped in ``utils/api_requests.py`` with in-memory
+state and the site's quirks: the HTTP status is always 200 and the real
+outcome is the ``responseCode`` field of a JSON body served as ``text/html``.
+
+Point the tests at it with ``ADDRESS=http://127.0.0.1:8000/``:
+
+    poetry run stub-server --port 8000 --latency-ms 80 --jitter-ms 40 --error-rate 0.01
+
+Injected errors are real HTTP 503 responses, like an overloaded upstream.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qsl, urlparse
+
+# A sample of the public catalog: (id, name, price, brand, usertype, category)
+PRODUCTS = [
+    (1, "Blue Top", 500, "Polo", "Women", "Tops"),
+    (2, "Men Tshirt", 400, "H&M", "Men", "Tshirts"),
+    (3, "Sleeveless Dress", 1000, "Madame", "Women", "Dress"),
+    (4, "Stylish Dress", 1500, "Madame", "Women", "Dress"),
+    (5, "Winter Top", 600, "Mast & Harbour", "Women", "Tops"),
+    (6, "Summer White Top", 400, "H&M", "Women", "Tops"),
+    (7, "Madame Top For Women", 1000, "Madame", "Women", "Tops"),
+    (8, "Fancy Green Top", 700, "Polo", "Women", "Tops"),
+    (11, "Sleeves Printed Top - White", 499, "Madame", "Women", "Tops"),
+    (
+        12,
+        "Half Sleeves Top Schiffli Detailing - Pink",
+        359,
+        "Mast & Harbour",
+        "Women",
+        "Tops",
+    ),
+    (13, "Frozen Tops For Kids", 278, "Mast & Harbour", "Kids", "Tops & Shirts"),
+    (14, "Full Sleeves Top Cherry - Pink", 679, "Babyhug", "Kids", "Tops & Shirts"),
+    (
+        15,
+        "Printed Off Shoulder Top - White",
+        315,
+        "Kookie Kids",
+        "Kids",
+        "Tops & Shirts",
+    ),
+    (
+        16,
+        "Sleeves Top and Short - Blue & Pink",
+        478,
+        "Kookie Kids",
+        "Kids",
+        "Tops & Shirts",
+    ),
+    (
+        18,
+        "Little Girls Mr. Panda Shirt",
+        543,
+        "Allen Solly Junior",
+        "Kids",
+        "Tops & Shirts",
+    ),
+    (
+        19,
+        "Sleeveless Unicorn Patch Gown - Pink",
+        1050,
+        "Kookie Kids",
+        "Kids",
+        "Dress",
+    ),
+    (20, "Cotton Mull Embroidered Dress", 1530, "Biba", "Women", "Dress"),
+    (21, "Blue Cotton Indie Mickey Dress", 1530, "Biba", "Kids", "Dress"),
+    (28, "Pure Cotton V-Neck T-Shirt", 1299, "Polo", "Men", "Tshirts"),
+    (29, "Green Side Placket Detail T-Shirt", 1000, "Polo", "Men", "Tshirts"),
+    (33, "Soft Stretch Jeans", 799, "H&M", "Men", "Jeans"),
+    (35, "Regular Fit Straight Jeans", 1200, "H&M", "Men", "Jeans"),
+    (37, "Rose Pink Embroidered Maxi Dress", 1600, "Biba", "Women", "Saree"),
+    (43, "GRAPHIC DESIGN MEN T SHIRT - BLUE", 1389, "Polo", "Men", "Tshirts"),
+]
+
+ACCOUNT_FIELDS = (
+    "name",
+    "email",
+    "password",
+    "title",
+    "birth_date",
+    "birth_month",
+    "birth_year",
+    "firstname",
+    "lastname",
+    "company",
+    "address1",
+    "address2",
+    "country",
+    "zipcode",
+    "state",
+    "city",
+    "mobile_number",
+)
+
+NOT_SUPPORTED = (405, "This request method is not supported.")
+
+
+def _product(row) -> dict:
+    pid, name, price, brand, usertype, category = row
+    return {
+        "id": pid,
+        "name": name,
+        "price": f"Rs. {price}",
+        "brand": brand,
+        "category": {"usertype": {"usertype": usertype}, "category": category},
+    }
+
+
+def _missing(params: str, method: str) -> tuple:
+    return 400, f"Bad request, {params} parameter is missing in {method} request."
+
+
+@dataclass
+class Faults:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+
+
+class StubState:
+    """In-memory accounts plus the static catalog; safe across handler threads."""
+
+    def __init__(self):
+        self.products = [_product(row) for row in PRODUCTS]
+        brands = dict.fromkeys(row[3] for row in PRODUCTS)
+        self.brands = [{"id": i, "brand": b} for i, b in enumerate(brands, 1)]
+        self.accounts: dict[str, dict] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def handle(self, method: str, path: str, form: dict) -> dict:
+        routes = {
+            "/api/productsList": self.products_list,
+            "/api/brandsList": self.brands_list,
+            "/api/searchProduct": self.search_product,
+            "/api/verifyLogin": self.verify_login,
+            "/api/createAccount": self.create_account,
+            "/api/deleteAccount": self.delete_account,
+            "/api/updateAccount": self.update_account,
+            "/api/getUserDetailByEmail": self.user_detail,
+        }
+        route = routes.get(path.rstrip("/"))
+        if route is None:
+            return {"responseCode": 404, "message": "API not found."}
+        result = route(method, form)
+        if isinstance(result, tuple):
+            code, message = result
+            return {"responseCode": code, "message": message}
+        return {"responseCode": 200, **result}
+
+    def products_list(self, method, form):
+        if method != "GET":
+            return NOT_SUPPORTED
+        return {"products": self.products}
+
+    def brands_list(self, method, form):
+        if method != "GET":
+            return NOT_SUPPORTED
+        return {"brands": self.brands}
+
+    def search_product(self, method, form):
+        if method != "POST":
+            return NOT_SUPPORTED
+        term = form.get("search_product")
+        if not term:
+            return _missing("search_product", "POST")
+        term = term.lower()
+        found = [
+            p
+            for p in self.products
+            if term in p["name"].lower()
+            or term in p["category"]["category"].lower()
+            or term in p["category"]["usertype"]["usertype"].lower()
+        ]
+        return {"products": found}
+
+    def verify_login(self, method, form):
+        if method != "POST":
+            return NOT_SUPPORTED
+        if not form.get("email") or not form.get("password"):
+            return _missing("email or password", "POST")
+        with self._lock:
+            account = self.accounts.get(form["email"])
+        if account is None or account["password"] != form["password"]:
+            return 404, "User not found!"
+        return 200, "User exists!"
+
+    def create_account(self, method, form):
+        if method != "POST":
+            return NOT_SUPPORTED
+        for field in ACCOUNT_FIELDS:
+            if not form.get(field):
+                return _missing(field, "POST")
+        with self._lock:
+            if form["email"] in self.accounts:
+                return 400, "Email already exists!"
+            account = {field: form[field] for field in ACCOUNT_FIELDS}
+            account["id"] = self._next_id
+            self._next_id += 1
+            self.accounts[form["email"]] = account
+        return 201, "User created!"
+
+    def delete_account(self, method, form):
+        if method != "DELETE":
+            return NOT_SUPPORTED
+        if not form.get("email") or not form.get("password"):
+            return _missing("email or password", "DELETE")
+        with self._lock:
+            account = self.accounts.get(form["email"])
+            if account is None or account["password"] != form["password"]:
+                return 404, "Account not found!"
+            del self.accounts[form["email"]]
+        return 200, "Account deleted!"
+
+    def update_account(self, method, form):
+        if method != "PUT":
+            return NOT_SUPPORTED
+        if not form.get("email") or not form.get("password"):
+            return _missing("email or password", "PUT")
+        with self._lock:
+            account = self.accounts.get(form["email"])
+            if account is None or account["password"] != form["password"]:
+                return 404, "Account not found!"
+            account.update({k: v for k, v in form.items() if k in ACCOUNT_FIELDS})
+        return 200, "User updated!"
+
+    def user_detail(self, method, form):
+        if method != "GET":
+            return NOT_SUPPORTED
+        if not form.get("email"):
+            return _missing("email", "GET")
+        with self._lock:
+            account = self.accounts.get(form["email"])
+        if account is None:
+            return 404, "Account not found with this email, try another email!"
+        return {
+            "user": {
+                "id": account["id"],
+                "name": account["name"],
+                "email": account["email"],
+                "title": account["title"],
+                "birth_day": account["birth_date"],
+                "birth_month": account["birth_month"],
+                "birth_year": account["birth_year"],
+                "first_name": account["firstname"],
+                "last_name": account["lastname"],
+                "company": account["company"],
+                "address1": account["address1"],
+                "address2": account["address2"],
+                "country": account["country"],
+                "state": account["state"],
+                "city": account["city"],
+                "zipcode": account["zipcode"],
+            }
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+    # Headers and body go out in separate writes; without TCP_NODELAY the body
+    # waits for the client's delayed ACK and every response gains ~40ms
+    disable_nagle_algorithm = True
+    server: "_StubHTTPServer"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _form(self, query: str) -> dict:
+        form = dict(parse_qsl(query))
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = self.rfile.read(length).decode()
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                form.update(json.loads(body or "{}"))
+            else:
+                form.update(parse_qsl(body))
+        return form
+
+    def _handle(self):
+        url = urlparse(self.path)
+        form = self._form(url.query)
+        faults = self.server.faults
+        delay = faults.latency_ms + random.uniform(-1, 1) * faults.jitter_ms
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if random.random() < faults.error_rate:
+            self._write(faults.error_status, b"Service Unavailable", "text/plain")
+            return
+        body = self.server.state.handle(self.command, url.path, form)
+        self._write(200, json.dumps(body).encode(), "text/html; charset=utf-8")
+
+    def _write(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = _handle
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, faults: Faults, verbose: bool):
+        super().__init__(address, _Handler)
+        self.state = StubState()
+        self.faults = faults
+        self.verbose = verbose
+
+
+class StubServer:
+    """Run the stand-in in a background thread, e.g. from a fixture or a bench."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        faults: Optional[Faults] = None,
+        verbose: bool = False,
+    ):
+        self.httpd = _StubHTTPServer((host, port), faults or Faults(), verbose)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def state(self) -> StubState:
+        return self.httpd.state
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    faults = Faults(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status)
+    httpd = _StubHTTPServer((args.host, args.port), faults, args.verbose)
+    print(f"\033[96m▶ Stand-in API listening on http://{args.host}:{args.port}/\033[0m")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
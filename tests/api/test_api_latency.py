@@ -0,0 +1,25 @@
+from dataclasses import asdict
+
+import pytest
+from requests import ConnectionError
+
+from utils.api_latency import ERROR, NETWORK, Sample, measure, summarize
+from utils.markers import api
+
+
+@api
+def test_failed_send_is_summarized_as_error():
+    """A send that raised has no ttfb and must not break the report."""
+
+    with pytest.raises(ConnectionError):
+        with measure("GET", "/api/productsList", NETWORK) as failed:
+            raise ConnectionError("connection refused")
+    answered = Sample("GET /api/productsList", "-", "-", ttfb=0.02, total=0.03)
+
+    summary = summarize([asdict(failed), asdict(answered)])
+
+    assert failed.source == ERROR and failed.ttfb is None
+    assert summary["count"] == 2
+    assert summary["sources"] == {ERROR: 1, NETWORK: 1}
+    assert summary["ttfb_ms"]["p50"] == 20.0
+    assert summary["client_ms"]["max"] == 10.0
@@ -0,0 +1,41 @@
+import asyncio
+from http import HTTPStatus
+
+from utils.api_requests import get_all_brands, get_all_products
+from utils.async_api_requests import AsyncApiClient
+from utils.markers import api
+
+
+@api
+def test_async_client_matches_sync_wrappers():
+    """Fetch products and brands concurrently and compare with the sync wrappers."""
+
+    async def fetch():
+        async with AsyncApiClient(concurrency=4) as client:
+            return await asyncio.gather(
+                client.get_all_products(), client.get_all_brands()
+            )
+
+    products, brands = asyncio.run(fetch())
+    assert products.json().get("responseCode") == HTTPStatus.OK
+    assert products.json() == get_all_products().json()
+    assert brands.json() == get_all_brands().json()
+
+
+@api
+def test_async_client_concurrent_searches(user_api):
+    """Keep several searches and a login check in flight at once."""
+
+    terms = ["top", "tshirt", "jean", "dress"]
+
+    async def fetch():
+        async with AsyncApiClient(concurrency=len(terms) + 1) as client:
+            return await asyncio.gather(
+                *(client.search_product(term) for term in terms),
+                client.verify_login_valid(user_api.email, user_api.password),
+            )
+
+    *searches, login = asyncio.run(fetch())
+    for resp in searches:
+        assert resp.json().get("responseCode") == HTTPStatus.OK
+    assert login.json().get("responseCode") == HTTPStatus.OK
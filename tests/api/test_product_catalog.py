@@ -0,0 +1,25 @@
+from http import HTTPStatus
+
+from utils.api_requests import get_all_products
+from utils.markers import api
+from utils.product_catalog import Product
+
+
+@api
+def test_catalog_indexes_match_products_list(product_catalog):
+    """Every product of the list response is reachable through each index."""
+
+    resp = get_all_products()
+    assert resp.json().get("responseCode") == HTTPStatus.OK
+    products = [Product.from_api(raw) for raw in resp.json()["products"]]
+
+    assert len(product_catalog) == len({p.id for p in products})
+    for product in products:
+        assert product_catalog.get(product.id) == product
+        assert product in product_catalog.by_brand(product.brand)
+        assert product in product_catalog.by_category(
+            product.category, product.usertype
+        )
+        assert product_catalog.by_name(f" {product.name.upper()} ").name in {
+            p.name for p in products if p.name.casefold() == product.name.casefold()
+        }
@@ -1,9 +1,16 @@
 import logging
 from http import HTTPStatus
 
-from utils.api_requests import create_account, delete_account, verify_login_valid
+from utils.api_requests import (
+    create_account,
+    create_accounts,
+    delete_account,
+    delete_accounts,
+    verify_accounts,
+    verify_login_valid,
+)
 from utils.markers import api, usertests
-from utils.payloads import user_create_payload
+from utils.payloads import get_payload_factory, user_create_payload
 
 logger = logging.getLogger(__name__)
 
@@ -30,3 +37,21 @@ def test_create_account_with_fixture(user_api):
     """Placeholder for testing account creation using a fixture."""
 
     pass
+
+
+@api
+@usertests
+def test_bulk_create_verify_delete_accounts():
+    """Provision a batch of users concurrently, verify them, then tear them down."""
+
+    users = get_payload_factory().users(5)
+
+    created = create_accounts(users)
+    assert all(r.ok for r in created), [r for r in created if not r.ok]
+    assert [r.email for r in created] == [u["email"] for u in users]
+
+    assert all(r.ok for r in verify_accounts(users))
+
+    deleted = delete_accounts(users)
+    assert all(r.ok for r in deleted), [r for r in deleted if not r.ok]
+    logger.info("bulk delete took %.2fs", max(r.elapsed for r in deleted))
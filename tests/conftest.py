@@ -1,24 +1,66 @@
+# isort: off
+# First import: profiles everything below when QA_STARTUP_PROFILE=1
+import utils.startup_profile  # noqa: F401
+
+# isort: on
 import logging
 import os
 from http import HTTPStatus
 
 import pytest
-from faker import Faker
-from pytest_html import extras
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options as ChromeOptions
 
-from components.consent_popup import ConsentPopup
 from tests.conftest_helpers import (
+    artifacts_dir,
+    collect_worker_stats,
     configure_print_logging,
+    could_match_markexpr,
+    latency_html,
+    latency_report_path,
     load_selected_env,
-    make_screenshot_path,
+    load_worker_stats,
+    report_latency,
+    report_startup_profiles,
+    report_worker_stats,
     restore_print_logging,
+    save_duration_history,
+)
+from utils.api_latency import (
+    get_latency_recorder,
+    latency_report,
+    write_latency_report,
 )
 from utils.api_requests import create_account, delete_account, verify_login_valid
+from utils.browser_logs import get_performance_log
+from utils.cassette import (
+    DEFAULT_PATH,
+    MODES,
+    RECORD,
+    CassetteMiss,
+    configure_cassette,
+    get_cassette,
+)
+from utils.driver_pool import close_driver_pool, get_driver_pool
+from utils.duration_history import get_duration_history
+from utils.failure_bundle import bundles_enabled, write_bundle
+from utils.impact import get_impact_recorder, impacted, verify_ref
+from utils.network_blocking import collect as collect_blocked_requests
 from utils.payloads import User, user_create_payload
+from utils.prefetch import close_prefetcher, get_prefetcher
+from utils.product_catalog import ProductCatalog, get_product_catalog
+from utils.response_cache import clear_response_cache
+from utils.retry_policy import clear_circuit_breakers
+from utils.screenshots import close_screenshot_writer, get_screenshot_writer
+from utils.startup_profile import get_startup_profile
+from utils.storage_state import capture as capture_storage
+from utils.storage_state import (
+    invalidate_consent_snapshot,
+    load_consent_snapshot,
+    open_with_state,
+    save_consent_snapshot,
+)
+from utils.user_pool import close_user_pool, get_user_pool, user_pool_enabled
+from utils.workers import env_flag, worker_id
 
-fake = Faker("pl_PL")
 logging.basicConfig(
     level=logging.INFO,
     format="%(message)s",
@@ -30,21 +72,214 @@ logging.basicConfig(
 _env_msg = load_selected_env()
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--cassette",
+        choices=MODES,
+        default=None,
+        help="record or replay API exchanges (default: API_CASSETTE env or off)",
+    )
+    parser.addoption(
+        "--cassette-path",
+        default=None,
+        help=f"cassette file (default: API_CASSETTE_PATH env or {DEFAULT_PATH})",
+    )
+    parser.addoption(
+        "--impacted-since",
+        metavar="REF",
+        default=None,
+        help="run only tests affected by the files changed since git REF",
+    )
+    parser.addoption(
+        "--xdist-schedule",
+        choices=("affinity", "duration"),
+        default=None,
+        help=(
+            "with -n: affinity keeps tests sharing driver/user_api setup on one "
+            "worker, duration runs tests longest-first (both use past durations)"
+        ),
+    )
+
+
 def pytest_report_header(config):
-    return _env_msg
+    cassette = get_cassette()
+    if cassette is None:
+        return _env_msg
+    return f"{_env_msg}[cassette] {cassette.mode}: {cassette.path}\n"
 
 
 def pytest_configure(config):
     configure_print_logging()
+    try:
+        cassette = configure_cassette(
+            config.getoption("cassette"), config.getoption("cassette_path")
+        )
+    except CassetteMiss as e:
+        raise pytest.UsageError(str(e))
+    if cassette and cassette.mode == RECORD and not hasattr(config, "workerinput"):
+        cassette.clear_shards()
+    if not hasattr(config, "workerinput"):
+        # Cached responses and breaker state are shared by one run's workers only
+        clear_response_cache()
+        clear_circuit_breakers()
+    if config.getoption("impacted_since"):
+        try:
+            verify_ref(config.getoption("impacted_since"))
+        except ValueError as e:
+            raise pytest.UsageError(str(e))
+    if config.getoption("xdist_schedule") and not hasattr(config, "workerinput"):
+        from utils.xdist_scheduling import ensure_testrunuid
+
+        ensure_testrunuid(config)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    schedule = config.getoption("xdist_schedule")
+    if schedule == "affinity":
+        from utils.xdist_scheduling import AffinityScheduling
+
+        return AffinityScheduling(config, log)
+    if schedule == "duration":
+        from utils.xdist_scheduling import DurationScheduling
+
+        return DurationScheduling(config, log)
+    return None
 
 
 def pytest_unconfigure(config):
     restore_print_logging()
 
 
+# Client-side stats (HTTP pool, response cache), keyed by xdist worker id
+_worker_stats: dict[str, dict] = {}
+# Raw Request.send() timings, keyed by xdist worker id
+_latency_samples: dict[str, list] = {}
+_latency: dict = {}
+# Import-time profiles (QA_STARTUP_PROFILE=1), keyed by xdist worker id
+_startup_profiles: dict[str, dict] = {}
+
+
+def pytest_ignore_collect(collection_path, config):
+    # With -m, skip importing test modules none of whose tests can match
+    # (e.g. the selenium-heavy UI modules on `-m api` runs)
+    markexpr = config.option.markexpr
+    if not markexpr or not env_flag("QA_MARK_PREFILTER", True):
+        return None
+    name = collection_path.name
+    if not (name.startswith("test_") and name.endswith(".py")):
+        return None
+    if not could_match_markexpr(collection_path, markexpr):
+        return True
+    return None
+
+
+def pytest_collection_finish(session):
+    profile = get_startup_profile()
+    if profile is not None:
+        profile.mark("collected")
+
+
+def pytest_collection_modifyitems(config, items):
+    ref = config.getoption("impacted_since")
+    if ref:
+        selected = impacted((item.nodeid for item in items), ref)
+        deselected = [item for item in items if item.nodeid not in selected]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = [item for item in items if item.nodeid in selected]
+    affinity = config.getoption("xdist_schedule") == "affinity"
+    if affinity and hasattr(config, "workerinput"):
+        from utils.xdist_scheduling import write_fixture_map
+
+        # The controller schedules from this map; it never collects itself
+        write_fixture_map(config, items)
+    if config.option.collectonly or not user_pool_enabled():
+        return
+    params = {
+        _user_api_param(item) for item in items if "user_api" in item.fixturenames
+    }
+    if params:
+        # Top up the shared account pool while the first tests start: every
+        # worker may hold one session-scoped account per user_api param
+        workers = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", 1))
+        get_user_pool().maintain_in_background(demand=workers * len(params))
+
+
+def pytest_sessionfinish(session):
+    # Unclaimed prefetches go back to the pools before those close
+    close_prefetcher()
+    close_user_pool()
+    close_driver_pool()
+    close_screenshot_writer()
+    get_impact_recorder().save()
+    cassette = get_cassette()
+    if cassette is not None:
+        cassette.save_shard()
+    stats = collect_worker_stats()
+    samples = get_latency_recorder().samples()
+    profile = get_startup_profile()
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["qa_stats"] = stats
+        workeroutput["qa_latency"] = samples
+        if profile is not None:
+            workeroutput["qa_startup"] = profile.snapshot()
+        return
+    if profile is not None:
+        _startup_profiles["master"] = profile.snapshot()
+    if not _worker_stats:
+        _worker_stats["master"] = load_worker_stats(stats)
+    if not _latency_samples and samples:
+        _latency_samples["master"] = samples
+    if _latency_samples:
+        _latency["report"] = latency_report(_latency_samples)
+        _latency["path"] = write_latency_report(
+            _latency["report"], latency_report_path(session.config)
+        )
+    if cassette is not None and cassette.mode == RECORD:
+        cassette.merge()
+    if not session.config.option.collectonly:
+        save_duration_history(_worker_stats)
+    if user_pool_enabled() and not env_flag("USER_POOL_KEEP", True):
+        get_user_pool().drain()
+
+
+def pytest_runtest_logreport(report):
+    # On the controller this sees the reports of every worker
+    if worker_id() == "master" and not report.skipped:
+        get_duration_history().record(report.nodeid, report.when, report.duration)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    workeroutput = getattr(node, "workeroutput", {})
+    if workeroutput.get("qa_stats"):
+        _worker_stats[node.gateway.id] = load_worker_stats(workeroutput["qa_stats"])
+    if workeroutput.get("qa_latency"):
+        _latency_samples[node.gateway.id] = workeroutput["qa_latency"]
+    if workeroutput.get("qa_startup"):
+        _startup_profiles[node.gateway.id] = workeroutput["qa_startup"]
+
+
+def pytest_terminal_summary(terminalreporter):
+    report_worker_stats(terminalreporter, _worker_stats)
+    if _latency:
+        report_latency(terminalreporter, _latency["report"], _latency["path"])
+    if _startup_profiles:
+        report_startup_profiles(terminalreporter, _startup_profiles)
+
+
+def pytest_html_results_summary(prefix, summary, postfix):
+    if _latency:
+        prefix.append(latency_html(_latency["report"], _latency["path"]))
+
+
 @pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_makereport(item, call):
     report = (yield).get_result()
+    # The driver fixture checks these to drop sessions of failed tests
+    setattr(item, f"rep_{report.when}", report)
     if report.when != "call":
         return
 
@@ -55,73 +290,188 @@ def pytest_runtest_makereport(item, call):
     driver = item.funcargs.get("driver")
     if not driver:
         return
+    from pytest_html import extras
 
-    # Save screenshot
-    p = make_screenshot_path(item)
-    driver.save_screenshot(str(p))
+    # Grab the image now; the files are written in the background
+    full, thumb = get_screenshot_writer(artifacts_dir(item.config)).capture(driver)
 
-    # Relative path to HTML file
-    html_report_path = item.config.option.htmlpath
-    rel_path = os.path.relpath(p, start=os.path.dirname(html_report_path))
+    # Relative paths from the HTML file
+    report_dir = os.path.dirname(item.config.option.htmlpath)
+    full_rel = os.path.relpath(full, start=report_dir)
+    thumb_rel = os.path.relpath(thumb, start=report_dir)
 
-    # Embed clickable screenshot
+    # Embed a thumbnail linking to the full screenshot
     html_snippet = (
-        f'<div><img src="{rel_path}" alt="screenshot" '
-        f'style="width:600px; height:auto; display:block; float:right; margin:10px;" '
-        f'onclick="window.open(this.src)"/></div>'
+        f'<div><a href="{full_rel}" target="_blank"><img src="{thumb_rel}" '
+        f'alt="screenshot" style="width:600px; height:auto; display:block; '
+        f'float:right; margin:10px;"/></a></div>'
     )
+    # Real failures (reruns included) also get the DOM/console/HAR bundle
+    if report.failed and bundles_enabled():
+        bundle = write_bundle(driver, report, artifacts_dir(item.config))
+        bundle_rel = os.path.relpath(bundle, start=report_dir)
+        html_snippet += (
+            f'<div><a href="{bundle_rel}">Failure bundle '
+            f"(DOM, console log, network HAR)</a></div>"
+        )
 
     extra = getattr(report, "extra", [])
     extra.append(extras.html(html_snippet))
     report.extras = extra
 
 
-@pytest.fixture(scope="class")
-def driver():
-    browser = os.getenv("BROWSER", "chrome").lower()
-    remote = os.getenv("SELENIUM_REMOTE_URL")
-    headless = os.getenv("HEADLESS", "true").lower() in ("1", "true", "yes")
-
-    # Use ChromeOptions for both Chrome and Opera
-    opts = ChromeOptions()
-    if headless:
-        opts.add_argument("--headless")
-        opts.add_argument("--disable-dev-shm-usage")
-        # Opera-specific tweak for GPU
-        if browser == "opera":
-            opts.add_argument("--disable-gpu")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--window-size=2560,1440")
-
-    driver = webdriver.Remote(command_executor=remote, options=opts)
-    driver.set_window_size(2560, 1440)
-    yield driver
-    driver.quit()
+# Set by the driver fixture when the prefetch already opened ADDRESS
+_ADDRESS_OPENED = pytest.StashKey[bool]()
+# Seconds a restored consent snapshot gives the popup to show up anyway
+CONSENT_RECHECK_TIMEOUT = 1
+# user_api params with a live session-scoped instance (nothing to prefetch)
+_user_api_live: set = set()
 
 
-@pytest.fixture(scope="class")
-def driver_on_address(driver):
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    # Start the slow setup of this test's fixtures concurrently, and the API
+    # side of the next test's fixtures while this one runs
+    recorder = get_impact_recorder()
+    recorder.begin(item.nodeid)
+    prefetcher = get_prefetcher()
+    if "driver" in item.fixturenames:
+        open_address = "driver_on_address" in item.fixturenames
+        prefetcher.submit(
+            (item.nodeid, "driver"),
+            lambda: _checkout_driver(open_address),
+            lambda checked_out: get_driver_pool().checkin(checked_out[0]),
+        )
+    for test in (item, nextitem):
+        if test is None or "user_api" not in test.fixturenames:
+            continue
+        delete = _user_api_param(test)
+        if delete not in _user_api_live:
+            prefetcher.submit(("user_api", delete), _make_user_api, _release_user_api)
+    yield
+    prefetcher.discard(lambda key: key[0] == item.nodeid)
+    setup = getattr(item, "rep_setup", None)
+    if setup is None or not setup.passed:
+        recorder.forget(item.nodeid)
+
+
+def _checkout_driver(open_address: bool) -> tuple:
+    get_impact_recorder().install()
+    driver = get_driver_pool().checkout()
+    if open_address:
+        try:
+            _open_address(driver)
+        except Exception:
+            get_driver_pool().checkin(driver, failed=True)
+            raise
+    return driver, open_address
+
+
+def _open_address(driver) -> None:
+    from components.consent_popup import ConsentPopup
+
     address = os.environ.get("ADDRESS")
     if not address:
         raise RuntimeError("ADDRESS env var not set!")
+    popup = ConsentPopup(driver)
+    # Consent given in an earlier session is restored instead of clicked
+    snapshot = load_consent_snapshot(address)
+    if snapshot is not None:
+        open_with_state(driver, address, snapshot)
+        if not popup.is_shown(timeout=CONSENT_RECHECK_TIMEOUT):
+            return
+        # The site did not take the restored consent: click it and save anew
+        invalidate_consent_snapshot(address)
+        before = capture_storage(driver)
+        popup.accept()
+        save_consent_snapshot(address, before, capture_storage(driver))
+        return
     driver.get(address)
-    ConsentPopup(driver).accept()  # Handles the popup if present
+    before = capture_storage(driver)
+    if popup.accept():  # Handles the popup if present
+        save_consent_snapshot(address, before, capture_storage(driver))
+
+
+@pytest.fixture
+def driver(request):
+    # A pooled session of this worker, reset since its previous test
+    driver, opened = get_prefetcher().take(
+        (request.node.nodeid, "driver"), lambda: _checkout_driver(False)
+    )
+    request.node.stash[_ADDRESS_OPENED] = opened
+    yield driver
+    failed = any(
+        getattr(request.node, f"rep_{when}", None) is not None
+        and getattr(request.node, f"rep_{when}").failed
+        for when in ("setup", "call")
+    )
+    collect_blocked_requests(driver)
+    perf_log = get_performance_log(driver)
+    if perf_log is not None:
+        perf_log.clear()  # the next test's HAR starts here
+    get_driver_pool().checkin(driver, failed=failed)
+
+
+@pytest.fixture
+def driver_on_address(request, driver):
+    if not request.node.stash.get(_ADDRESS_OPENED, False):
+        _open_address(driver)
 
     yield driver
 
 
+@pytest.fixture(scope="session")
+def product_catalog() -> ProductCatalog:
+    """Products from /api/productsList, indexed by id, name, brand and category."""
+    return get_product_catalog()
+
+
 @pytest.fixture(scope="session")
 def user_api(request):
-    user_data = user_create_payload()
-    other = {
-        k: v for k, v in user_data.items() if k not in ("name", "email", "password")
-    }
-    user = User(user_data["name"], user_data["email"], user_data["password"], other)
-    create_account(user_data)
-    yield user
-    # Default: delete unless param==False
+    # Default: clean up unless param==False (the test deletes the account itself)
     delete = getattr(request, "param", True)
+    user_data = get_prefetcher().take(("user_api", delete), _make_user_api)
+    user = _as_user(user_data)
+    _user_api_live.add(delete)
+    yield user
+    _user_api_live.discard(delete)
+    if user_pool_enabled():
+        pool = get_user_pool()
+        if delete:
+            pool.checkin(user_data)
+        else:
+            pool.discard(user_data)
+        return
+
     if delete:
         delete_account(user.email, user.password)
         resp = verify_login_valid(user.email, user.password)
         assert resp.json().get("responseCode") == HTTPStatus.NOT_FOUND
+
+
+def _user_api_param(item) -> bool:
+    callspec = getattr(item, "callspec", None)
+    return callspec.params.get("user_api", True) if callspec else True
+
+
+def _make_user_api() -> dict:
+    if user_pool_enabled():
+        return get_user_pool().checkout()
+    user_data = user_create_payload()
+    create_account(user_data)
+    return user_data
+
+
+def _release_user_api(user_data: dict) -> None:
+    # An account that was prefetched but never handed to a test
+    if user_pool_enabled():
+        get_user_pool().checkin(user_data)
+    else:
+        delete_account(user_data["email"], user_data["password"])
+
+
+def _as_user(user_data: dict) -> User:
+    other = {
+        k: v for k, v in user_data.items() if k not in ("name", "email", "password")
+    }
+    return User(user_data["name"], user_data["email"], user_data["password"], other)
@@ -4,14 +4,133 @@ This module keeps non-fixture utilities out of ``conftest.py`` so that file
 contains only hooks and fixtures.
 """
 
+import ast
 import builtins
+import html
 import logging
 import os
-import time
 from pathlib import Path
+from typing import List, Optional
 
 from dotenv import find_dotenv, load_dotenv
 
+from utils.driver_pool import DriverPoolStats, driver_pool_stats
+from utils.duration_history import get_duration_history
+from utils.failure_bundle import BundleStats, bundle_stats
+from utils.login_session import LoginStats, login_stats
+from utils.network_blocking import NetworkStats, network_stats
+from utils.prefetch import PrefetchStats, prefetch_stats
+from utils.response_cache import CacheStats, response_cache_stats
+from utils.retry_policy import RetryStats, retry_stats
+from utils.screenshots import ScreenshotStats, screenshot_stats
+from utils.session_pool import PoolStats, get_session_pool
+
+# ---- collection ------------------------------------------------------------
+
+try:
+    from _pytest.mark.expression import Expression
+except ImportError:  # private API; without it every file is collected
+    Expression = None
+
+
+class _UnknownMarks(Exception):
+    """The marks of a test can't be told without importing its module."""
+
+
+def _mark_name(node, aliases: dict) -> Optional[str]:
+    # pytest.mark.api / pytest.mark.xfail(...) / api (alias from utils.markers)
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Attribute):
+        owner = node.value
+        if isinstance(owner, ast.Attribute) and owner.attr == "mark":
+            return node.attr
+        if isinstance(owner, ast.Name) and owner.id == "mark":
+            return node.attr
+        return None
+    if isinstance(node, ast.Name):
+        return aliases.get(node.id)
+    return None
+
+
+def _mark_variants(node, aliases: dict) -> List[set]:
+    """Mark sets a decorated test can end up with, one per parametrize variant."""
+
+    marks, extra = set(), [set()]
+    for decorator in node.decorator_list:
+        name = _mark_name(decorator, aliases)
+        if name is None:
+            continue
+        marks.add(name)
+        # pytest.param(..., marks=...) adds marks to single parameter sets
+        for kw in ast.walk(decorator):
+            if not (isinstance(kw, ast.keyword) and kw.arg == "marks"):
+                continue
+            values = (
+                kw.value.elts
+                if isinstance(kw.value, (ast.List, ast.Tuple))
+                else [kw.value]
+            )
+            names = {_mark_name(v, aliases) for v in values}
+            if None in names:
+                raise _UnknownMarks
+            extra.append(names)
+    return [marks | e for e in extra]
+
+
+def _static_test_marks(source: str) -> Optional[List[set]]:
+    """Possible mark sets of the tests of a module, None if not known statically."""
+
+    tree = ast.parse(source)
+    aliases = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id == "pytestmark":
+            return None
+        if isinstance(node, ast.ImportFrom) and node.module == "utils.markers":
+            aliases.update({a.asname or a.name: a.name for a in node.names})
+
+    tests = []
+
+    def visit(body, inherited: List[set]):
+        for node in body:
+            if isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+                own = _mark_variants(node, aliases)
+                visit(node.body, [i | o for i in inherited for o in own])
+            elif isinstance(
+                node, (ast.FunctionDef, ast.AsyncFunctionDef)
+            ) and node.name.startswith("test"):
+                own = _mark_variants(node, aliases)
+                tests.extend(i | o for i in inherited for o in own)
+
+    try:
+        visit(tree.body, [set()])
+    except _UnknownMarks:
+        return None
+    return tests
+
+
+def could_match_markexpr(path: Path, markexpr: str) -> bool:
+    """False only if no test in ``path`` can be selected by ``-m markexpr``.
+
+    Lets ``-m api`` skip importing the UI modules (and with them selenium)
+    instead of importing everything and deselecting afterwards.
+    """
+
+    if Expression is None:
+        return True
+    try:
+        expression = Expression.compile(markexpr)
+        tests = _static_test_marks(path.read_text(encoding="utf-8"))
+    except Exception:  # bad -m expression (ParseError/SyntaxError by version), IO
+        return True  # let pytest collect it and report the problem
+    if tests is None:
+        return True
+    return any(
+        expression.evaluate(lambda name, **kwargs: not kwargs and name in marks)
+        for marks in tests
+    )
+
+
 # ---- environment helpers ---------------------------------------------------
 
 
@@ -58,11 +177,155 @@ def restore_print_logging() -> None:
 # ---- artifacts -------------------------------------------------------------
 
 
-def make_screenshot_path(item) -> Path:
-    """Build a timestamped screenshot path under ``tests/artifacts``."""
+def artifacts_dir(config) -> Path:
+    """``tests/artifacts``: screenshots, reports and other run output."""
+
+    return Path(config.rootpath, "tests", "artifacts")
+
+
+# ---- reporting -------------------------------------------------------------
+
+# Client-side counters each worker ships to the controller at session end
+_STATS_SECTIONS = {
+    "HTTP connection pool": (PoolStats, lambda: get_session_pool().stats()),
+    "API response cache": (CacheStats, response_cache_stats),
+    "API retries": (RetryStats, retry_stats),
+    "WebDriver pool": (DriverPoolStats, driver_pool_stats),
+    "Fixture prefetch": (PrefetchStats, prefetch_stats),
+    "Network blocking": (NetworkStats, network_stats),
+    "Screenshots": (ScreenshotStats, screenshot_stats),
+    "Failure bundles": (BundleStats, bundle_stats),
+    "HTTP logins": (LoginStats, login_stats),
+}
+
+
+def collect_worker_stats() -> dict:
+    """Snapshot this process' counters as plain dicts (xdist ``workeroutput``)."""
+
+    return {title: get().as_dict() for title, (_, get) in _STATS_SECTIONS.items()}
+
+
+def load_worker_stats(raw: dict) -> dict:
+    """Rebuild the stats objects from :func:`collect_worker_stats` output."""
+
+    return {
+        title: cls(**raw[title])
+        for title, (cls, _) in _STATS_SECTIONS.items()
+        if title in raw
+    }
+
+
+def report_worker_stats(terminalreporter, worker_stats: dict) -> None:
+    """Print one terminal-summary section per counter type, per worker."""
+
+    for title, (cls, _) in _STATS_SECTIONS.items():
+        used = {
+            worker: stats[title]
+            for worker, stats in worker_stats.items()
+            if title in stats and any(stats[title].as_dict().values())
+        }
+        if not used:
+            continue
+        terminalreporter.write_sep("-", title)
+        for worker, stats in sorted(used.items()):
+            terminalreporter.write_line(f"{worker}: {stats.summary()}")
+        if len(used) > 1:
+            total = sum(used.values(), cls())
+            terminalreporter.write_line(f"total: {total.summary()}")
+
+
+def save_duration_history(worker_stats: dict) -> None:
+    """Store this run's test durations and the mean browser session start-up."""
+
+    history = get_duration_history()
+    pools = [
+        s["WebDriver pool"] for s in worker_stats.values() if "WebDriver pool" in s
+    ]
+    total = sum(pools, DriverPoolStats())
+    if total.created:
+        history.record_fixture("driver", total.startup / total.created)
+    history.save()
+
+
+# ---- API latency -----------------------------------------------------------
+
+
+def latency_report_path(config) -> Path:
+    return artifacts_dir(config) / "api_latency.json"
+
+
+def _latency_rows(report: dict) -> list:
+    rows = []
+    for endpoint, s in report["endpoints"].items():
+        total, ttfb = s["total_ms"], s["ttfb_ms"]
+        rows.append(
+            (
+                endpoint,
+                s["count"],
+                total["p50"],
+                total["p95"],
+                total["p99"],
+                ttfb["p50"],
+                s["connect_ms"]["p50"],
+                s["client_ms"]["p95"],
+                s["handshakes"],
+            )
+        )
+    return rows
+
+
+_LATENCY_COLUMNS = (
+    "endpoint",
+    "calls",
+    "p50 ms",
+    "p95 ms",
+    "p99 ms",
+    "ttfb p50",
+    "connect p50",
+    "client p95",
+    "handshakes",
+)
+
+
+def report_latency(terminalreporter, report: dict, path: Path) -> None:
+    """Print per-endpoint percentiles; details live in the JSON artifact."""
+
+    terminalreporter.write_sep("-", "API latency")
+    for endpoint, calls, p50, p95, p99, ttfb, connect, client, _ in _latency_rows(
+        report
+    ):
+        terminalreporter.write_line(
+            f"{endpoint}: {calls} calls, p50 {p50}ms p95 {p95}ms p99 {p99}ms "
+            f"(ttfb p50 {ttfb}ms, connect p50 {connect}ms, client p95 {client}ms)"
+        )
+    terminalreporter.write_line(f"details: {path}")
+
+
+def report_startup_profiles(terminalreporter, profiles: dict) -> None:
+    """Print the slowest imports per worker (``QA_STARTUP_PROFILE=1``)."""
+
+    terminalreporter.write_sep("-", "Startup profile")
+    for worker, profile in sorted(profiles.items()):
+        marks = ", ".join(f"{k} at {v}ms" for k, v in profile["marks"].items())
+        terminalreporter.write_line(
+            f"{worker}: {profile['modules']} modules imported after conftest"
+            + (f"; {marks}" if marks else "")
+        )
+        for name, cumulative, own in profile["slowest_ms"]:
+            terminalreporter.write_line(
+                f"  {cumulative:>8.1f}ms {own:>8.1f}ms self  {name}"
+            )
+
+
+def latency_html(report: dict, path: Path) -> str:
+    """Render the per-endpoint table for the pytest-html summary."""
 
-    ts = time.strftime("%Y%m%d-%H%M%S")
-    safe = item.nodeid.replace("::", "_").replace("/", "_")
-    path = Path(item.config.rootpath, "tests", "artifacts", f"{ts}_{safe}.png")
-    path.parent.mkdir(parents=True, exist_ok=True)
-    return path
+    head = "".join(f"<th>{html.escape(c)}</th>" for c in _LATENCY_COLUMNS)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in row) + "</tr>"
+        for row in _latency_rows(report)
+    )
+    return (
+        f"<h2>API latency</h2><table><tr>{head}</tr>{body}</table>"
+        f"<p>Per-worker and per-wrapper breakdown: {html.escape(path.name)}</p>"
+    )
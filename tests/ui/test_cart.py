@@ -5,27 +5,29 @@ from helper_functions_for_tests.cart_tests_helpers import (
     add_from_main,
     assert_cart_all,
     open_cart,
+    seed_cart,
 )
+from pages.main_page import FeaturesItems
 from utils.markers import cart, ui
 
 
 @ui
 @cart
-def test_add_single_product(driver_on_address):
+def test_add_single_product(driver_on_address, product_catalog):
     """Add a single product from the main page and verify it appears in the cart."""
 
-    prod = add_from_main(driver_on_address, idx=0)
+    prod = add_from_main(driver_on_address, idx=0, catalog=product_catalog)
     cart = open_cart(driver_on_address)
-    assert_cart_all(cart, [(prod.name, prod.qty, prod.price)])
+    assert_cart_all(cart, [(prod.name, prod.qty, prod.price)], catalog=product_catalog)
 
 
 @ui
 @cart
-def test_add_two_products(driver_on_address):
+def test_add_two_products(driver_on_address, product_catalog):
     """Add two different products from the main page and verify both are listed."""
 
-    prod1 = add_from_main(driver_on_address, idx=0)
-    prod2 = add_from_main(driver_on_address, idx=1)
+    prod1 = add_from_main(driver_on_address, idx=0, catalog=product_catalog)
+    prod2 = add_from_main(driver_on_address, idx=1, catalog=product_catalog)
     cart = open_cart(driver_on_address)
     assert_cart_all(
         cart,
@@ -33,6 +35,7 @@ def test_add_two_products(driver_on_address):
             (prod1.name, prod1.qty, prod1.price),
             (prod2.name, prod2.qty, prod2.price),
         ],
+        catalog=product_catalog,
     )
 
 
@@ -95,6 +98,47 @@ def test_add_multiple_products_from_details(driver_on_address):
     )
 
 
+@ui
+@cart
+def test_bulk_reads_match_single_element_getters(driver_on_address, product_catalog):
+    """Cards and cart rows read in one browser call match the per-element getters."""
+
+    features = FeaturesItems(driver_on_address)
+    cards = features.records()
+    assert cards, "No product cards on the main page"
+    for idx in (0, len(cards) - 1):
+        assert cards[idx] == {
+            "name": features.get_product_name(idx),
+            "price": features.get_product_price(idx),
+            "url": features.get_product_detail_url(idx),
+            "id": features.get_product_id(idx),
+        }
+
+    seed_cart(driver_on_address, product_catalog, [(cards[0]["id"], 3)])
+    cart = open_cart(driver_on_address)
+    rows = {row["id"]: row for row in cart.get_row_records()}
+    for product_row in cart.get_all_rows():
+        assert rows[product_row.id()] == {
+            "id": product_row.id(),
+            "name": product_row.name(),
+            "price": product_row.price(),
+            "quantity": product_row.quantity(),
+            "total": product_row.total(),
+        }
+
+
+@ui
+@cart
+def test_cart_totals_for_seeded_products(driver_on_address, product_catalog):
+    """Cart rows and totals for products put into the session's cart over HTTP."""
+
+    products = seed_cart(driver_on_address, product_catalog, [(1, 2), (2, 1), (3, 4)])
+    cart = open_cart(driver_on_address)
+    assert_cart_all(
+        cart, [(p.name, p.qty, p.price) for p in products], catalog=product_catalog
+    )
+
+
 @ui
 @cart
 @pytest.mark.parametrize(
@@ -13,9 +13,8 @@ from utils.markers import usertests
 def test_delete_account_via_ui_and_verify_api(driver, user_api):
     """Delete an account through the UI and verify via API that it was removed."""
 
-    login_page = LoginPage(driver)
-    login_page.load()
-    login_page.login(user_api.email, user_api.password)
+    # Logging in is not under test here: skip the form
+    LoginPage(driver).login_via_http(user_api.email, user_api.password)
     DeleteAccountPage(driver).delete_account_and_continue()
     resp = verify_login_valid(user_api.email, user_api.password)
     assert resp.json().get("responseCode") == HTTPStatus.NOT_FOUND
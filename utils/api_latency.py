@@ -0,0 +1,210 @@
+"""Per-request latency samples for ``Request.send()``.
+
+Every call is timed and tagged with the endpoint, the ``utils.api_requests``
+wrapper that issued it and the running test:
+
+    connect   DNS lookup + TCP (+ TLS) handshake; 0 when a pooled connection
+              was reused
+    ttfb      request start until the response headers arrived
+    total     wall time of ``send()``, including our own client overhead
+    sent / received   request body and response bytes on the wire
+
+``source`` tells network calls apart from cache hits, cassette replays and
+sends that raised (``error``: connection failures, an open circuit breaker);
+those have no ``ttfb`` and count toward ``total`` only.
+Samples stay in the worker process; the controller merges them into
+percentiles per endpoint, worker and wrapper (see :func:`latency_report`).
+Set ``API_LATENCY=false`` to stop collecting (e.g. for long soak runs).
+"""
+
+import json
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from requests import Response
+
+from utils.workers import atomic_write, current_test, env_flag
+
+NETWORK, CACHE, ERROR = "network", "cache", "error"  # replays report "replay"
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    function: str
+    test: str
+    source: str = NETWORK
+    status: Optional[int] = None
+    connect: float = 0.0
+    ttfb: Optional[float] = None
+    total: float = 0.0
+    sent: int = 0
+    received: int = 0
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.enabled = env_flag("API_LATENCY", True)
+        self._lock = threading.Lock()
+        self._samples: List[Sample] = []
+
+    def add(self, sample: Sample) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._samples.append(sample)
+
+    def samples(self) -> List[dict]:
+        """Plain-dict copies, safe to ship through xdist ``workeroutput``."""
+
+        with self._lock:
+            return [asdict(s) for s in self._samples]
+
+
+_recorder = LatencyRecorder()
+_active = threading.local()
+
+
+def get_latency_recorder() -> LatencyRecorder:
+    return _recorder
+
+
+def _caller() -> str:
+    # Innermost public wrapper of utils.api_requests on the stack; private
+    # helpers and lambdas (batch fan-out) are skipped
+    frame = sys._getframe(1)
+    while frame is not None:
+        name = frame.f_code.co_name
+        module = frame.f_globals.get("__name__")
+        if module == "utils.api_requests" and not name.startswith(("_", "<")):
+            return name
+        frame = frame.f_back
+    return "-"
+
+
+@contextmanager
+def measure(method: str, path: Optional[str], source: str) -> Iterator[Sample]:
+    """Time one ``send()``; the caller fills in ``status`` on the way out."""
+
+    sample = Sample(
+        endpoint=f"{method} {path}",
+        function=_caller(),
+        test=current_test()[0] or "-",
+        source=source,
+    )
+    previous = getattr(_active, "sample", None)
+    _active.sample = sample
+    start = time.perf_counter()
+    try:
+        yield sample
+    except Exception:
+        sample.source = ERROR
+        raise
+    finally:
+        sample.total = time.perf_counter() - start
+        _active.sample = previous
+        _recorder.add(sample)
+
+
+def note_connect(seconds: float) -> None:
+    """Called by pooled connections each time a real handshake happens."""
+
+    sample = getattr(_active, "sample", None)
+    if sample is not None:
+        sample.connect += seconds
+
+
+def note_response(response: Response) -> None:
+    """Record network-level timings of a response that came off the wire."""
+
+    sample = getattr(_active, "sample", None)
+    if sample is None:
+        return
+    body = response.request.body or b""
+    tell = getattr(response.raw, "tell", None)
+    sample.source = NETWORK
+    sample.ttfb = response.elapsed.total_seconds()
+    sample.sent = len(body.encode() if isinstance(body, str) else body)
+    # Compressed size when urllib3 can tell it, decoded size otherwise
+    sample.received = tell() if tell else len(response.content)
+
+
+# --- Aggregation ---------------------------------------------------------------
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 for an empty list)."""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def _timings(values: List[float]) -> dict:
+    ms = [v * 1000 for v in values]
+    summary = {f"p{q}": round(percentile(ms, q), 1) for q in PERCENTILES}
+    summary["max"] = round(max(ms, default=0.0), 1)
+    return summary
+
+
+def summarize(samples: List[dict]) -> dict:
+    """Percentiles (in ms) and byte counts for a group of samples."""
+
+    network = [s for s in samples if s["source"] == NETWORK and s["ttfb"] is not None]
+    sources: Dict[str, int] = {}
+    for s in samples:
+        sources[s["source"]] = sources.get(s["source"], 0) + 1
+    return {
+        "count": len(samples),
+        "sources": sources,
+        "handshakes": sum(s["connect"] > 0 for s in network),
+        "total_ms": _timings([s["total"] for s in samples]),
+        "ttfb_ms": _timings([s["ttfb"] for s in network]),
+        "connect_ms": _timings([s["connect"] for s in network if s["connect"] > 0]),
+        # Time spent in our own stack after the headers arrived
+        "client_ms": _timings([max(s["total"] - s["ttfb"], 0) for s in network]),
+        "bytes_sent": sum(s["sent"] for s in samples),
+        "bytes_received": sum(s["received"] for s in samples),
+    }
+
+
+def _grouped(samples: List[dict], field: str) -> dict:
+    groups: Dict[str, List[dict]] = {}
+    for s in samples:
+        groups.setdefault(s[field], []).append(s)
+    return {name: summarize(group) for name, group in sorted(groups.items())}
+
+
+def latency_report(samples_by_worker: Dict[str, List[dict]]) -> dict:
+    """Merge every worker's samples into the JSON report structure."""
+
+    samples = [s for worker in samples_by_worker.values() for s in worker]
+    per_test: Dict[str, float] = {}
+    for s in samples:
+        per_test[s["test"]] = per_test.get(s["test"], 0.0) + s["total"]
+    slowest = sorted(per_test.items(), key=lambda kv: kv[1], reverse=True)[:10]
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "overall": summarize(samples),
+        "endpoints": _grouped(samples, "endpoint"),
+        "functions": _grouped(samples, "function"),
+        "workers": {
+            worker: _grouped(worker_samples, "endpoint")
+            for worker, worker_samples in sorted(samples_by_worker.items())
+        },
+        "slowest_tests_ms": {test: round(t * 1000, 1) for test, t in slowest},
+        "samples": {worker: s for worker, s in sorted(samples_by_worker.items())},
+    }
+
+
+def write_latency_report(report: dict, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, json.dumps(report, indent=1).encode())
+    return path
@@ -1,18 +1,36 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Callable, List, Optional
+
+from requests import Response
+
 from utils.request_builder import Request, RequestMethod
 
 # API wrapper for "automationexercise.com"
 
 
-def get_all_products():
-    return Request(RequestMethod.GET).path("/api/productsList").send()
+def get_all_products(cache: bool = False):
+    """
+    Params:
+        cache (bool): serve the list from the response cache of this run
+    """
+    request = Request(RequestMethod.GET).path("/api/productsList")
+    return (request.cache() if cache else request).send()
 
 
 def post_to_products_list():
     return Request(RequestMethod.POST).path("/api/productsList").send()
 
 
-def get_all_brands():
-    return Request(RequestMethod.GET).path("/api/brandsList").send()
+def get_all_brands(cache: bool = False):
+    """
+    Params:
+        cache (bool): serve the list from the response cache of this run
+    """
+    request = Request(RequestMethod.GET).path("/api/brandsList")
+    return (request.cache() if cache else request).send()
 
 
 def put_to_brands_list():
@@ -105,6 +123,77 @@ def delete_account(email: str, password: str):
     )
 
 
+@dataclass
+class BatchResult:
+    email: str
+    ok: bool
+    response_code: Optional[int]
+    elapsed: float
+    error: Optional[str] = None
+
+
+def _run_batch(
+    call: Callable[[dict], Response],
+    users: List[dict],
+    expected_code: int,
+    max_workers: int,
+) -> List[BatchResult]:
+    def run_one(user: dict) -> BatchResult:
+        start = time.perf_counter()
+        try:
+            code = call(user).json().get("responseCode")
+        except Exception as e:  # one broken item must not sink the batch
+            elapsed = time.perf_counter() - start
+            return BatchResult(user["email"], False, None, elapsed, repr(e))
+        elapsed = time.perf_counter() - start
+        return BatchResult(user["email"], code == expected_code, code, elapsed)
+
+    if not users:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(users))) as pool:
+        return list(pool.map(run_one, users))
+
+
+def create_accounts(users: List[dict], max_workers: int = 10) -> List[BatchResult]:
+    """
+    Create many accounts concurrently; results keep the order of ``users``.
+    Params:
+        users (list of dicts, same keys as create_account)
+        max_workers (int)
+    """
+    return _run_batch(create_account, users, HTTPStatus.CREATED, max_workers)
+
+
+def verify_accounts(users: List[dict], max_workers: int = 10) -> List[BatchResult]:
+    """
+    Check concurrently that every account can log in (``ok`` when it exists).
+    Params:
+        users (list of dicts with email and password)
+        max_workers (int)
+    """
+    return _run_batch(
+        lambda user: verify_login_valid(user["email"], user["password"]),
+        users,
+        HTTPStatus.OK,
+        max_workers,
+    )
+
+
+def delete_accounts(users: List[dict], max_workers: int = 10) -> List[BatchResult]:
+    """
+    Delete many accounts concurrently, e.g. to clean up after a crashed run.
+    Params:
+        users (list of dicts with email and password)
+        max_workers (int)
+    """
+    return _run_batch(
+        lambda user: delete_account(user["email"], user["password"]),
+        users,
+        HTTPStatus.OK,
+        max_workers,
+    )
+
+
 def update_account(user: dict):
     """
     Params in user dict (all same as create_account):
@@ -115,6 +204,25 @@ def update_account(user: dict):
     return Request(RequestMethod.PUT).path("/api/updateAccount").data(user).send()
 
 
+def add_to_cart(product_id: int, quantity: int = 1, cookies: Optional[dict] = None):
+    """
+    The site endpoint behind the "Add to cart" buttons (not part of /api):
+    the product goes into the cart of the session in ``cookies``.
+    Params:
+        product_id (int)
+        quantity (int)
+        cookies (dict): cookie name -> value, e.g. a browser's sessionid
+    """
+    return (
+        Request(RequestMethod.GET)
+        .path(f"/add_to_cart/{product_id}")
+        .params({"quantity": quantity})
+        .cookies(**(cookies or {}))
+        .live()  # the cart is the browser's: a replayed answer fills nothing
+        .send()
+    )
+
+
 def get_user_detail_by_email(email: str):
     """
     Params:
@@ -0,0 +1,125 @@
+"""Asyncio API wrapper for "automationexercise.com".
+
+Every coroutine on :class:`AsyncApiClient` mirrors the synchronous wrapper of
+the same name in :mod:`utils.api_requests`, so requests are still built with
+``Request``/``RequestMethod`` and sent through the worker's keep-alive pool.
+Blocking sends run on a thread pool bounded by ``concurrency``, which lets a
+single worker keep many calls in flight. The batch helpers
+(``create_accounts`` and friends) take one slot of that pool and fan out on
+their own ``max_workers`` threads, as the synchronous versions do.
+
+Example:
+    async with AsyncApiClient(concurrency=20) as client:
+        products, brands = await asyncio.gather(
+            client.get_all_products(), client.get_all_brands()
+        )
+
+Keep ``HTTP_POOL_MAXSIZE`` >= ``concurrency``, otherwise urllib3 discards the
+extra connections instead of keeping them alive.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, List, Optional, TypeVar
+
+from requests import Response
+
+from utils import api_requests
+from utils.api_requests import BatchResult
+from utils.request_builder import Request
+from utils.session_pool import get_session_pool
+from utils.workers import env_int
+
+T = TypeVar("T")
+
+
+class AsyncApiClient:
+    def __init__(self, concurrency: Optional[int] = None):
+        default = get_session_pool().config.pool_maxsize
+        self.concurrency = concurrency or env_int("API_ASYNC_CONCURRENCY", default)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="api-async"
+        )
+
+    async def __aenter__(self) -> "AsyncApiClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    async def _call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(func, *args, **kwargs)
+        )
+
+    async def send(self, request: Request) -> Response:
+        """Send any builder request, e.g. ``Request(RequestMethod.GET).path(..)``."""
+
+        return await self._call(request.send)
+
+    async def get_all_products(self, cache: bool = False) -> Response:
+        return await self._call(api_requests.get_all_products, cache=cache)
+
+    async def post_to_products_list(self) -> Response:
+        return await self._call(api_requests.post_to_products_list)
+
+    async def get_all_brands(self, cache: bool = False) -> Response:
+        return await self._call(api_requests.get_all_brands, cache=cache)
+
+    async def put_to_brands_list(self) -> Response:
+        return await self._call(api_requests.put_to_brands_list)
+
+    async def search_product(self, search_term: str) -> Response:
+        return await self._call(api_requests.search_product, search_term)
+
+    async def search_product_no_param(self) -> Response:
+        return await self._call(api_requests.search_product_no_param)
+
+    async def verify_login_valid(self, email: str, password: str) -> Response:
+        return await self._call(api_requests.verify_login_valid, email, password)
+
+    async def verify_login_no_email(self, password: str) -> Response:
+        return await self._call(api_requests.verify_login_no_email, password)
+
+    async def verify_login_delete(self) -> Response:
+        return await self._call(api_requests.verify_login_delete)
+
+    async def verify_login_invalid(self, email: str, password: str) -> Response:
+        return await self._call(api_requests.verify_login_invalid, email, password)
+
+    async def create_account(self, user: dict) -> Response:
+        return await self._call(api_requests.create_account, user)
+
+    async def delete_account(self, email: str, password: str) -> Response:
+        return await self._call(api_requests.delete_account, email, password)
+
+    async def create_accounts(
+        self, users: List[dict], max_workers: int = 10
+    ) -> List[BatchResult]:
+        return await self._call(api_requests.create_accounts, users, max_workers)
+
+    async def verify_accounts(
+        self, users: List[dict], max_workers: int = 10
+    ) -> List[BatchResult]:
+        return await self._call(api_requests.verify_accounts, users, max_workers)
+
+    async def delete_accounts(
+        self, users: List[dict], max_workers: int = 10
+    ) -> List[BatchResult]:
+        return await self._call(api_requests.delete_accounts, users, max_workers)
+
+    async def update_account(self, user: dict) -> Response:
+        return await self._call(api_requests.update_account, user)
+
+    async def add_to_cart(
+        self, product_id: int, quantity: int = 1, cookies: Optional[dict] = None
+    ) -> Response:
+        return await self._call(api_requests.add_to_cart, product_id, quantity, cookies)
+
+    async def get_user_detail_by_email(self, email: str) -> Response:
+        return await self._call(api_requests.get_user_detail_by_email, email)
@@ -0,0 +1,128 @@
+"""Browser logs of WebDriver sessions: console messages and DevTools network events.
+
+Chrome keeps its logs until they are read, and reading drains them, so every
+consumer of the performance log goes through one :class:`PerformanceLog` per
+session: it drains the browser's log and keeps the network events of the last
+``HAR_SECONDS`` in a ring buffer. ``utils/network_blocking.py`` counts blocked
+requests among the newly drained events, ``utils/failure_bundle.py`` turns the
+buffer into a HAR when a test fails.
+
+Tuning (all optional env vars):
+    HAR_SECONDS     seconds of network events kept per session (default 60;
+                    0 turns the performance log off for failure bundles)
+"""
+
+import json
+import logging
+import threading
+import weakref
+from collections import deque
+from typing import List, Optional
+
+from utils.workers import env_int
+
+log = logging.getLogger(__name__)
+
+# Bounds the buffer of a page that floods the network within HAR_SECONDS
+MAX_EVENTS = 20_000
+
+
+def enable_logs(opts, **levels: str) -> None:
+    """Add log types to the session's ``goog:loggingPrefs``, e.g. browser="ALL"."""
+
+    prefs = dict(opts.to_capabilities().get("goog:loggingPrefs", {}))
+    prefs.update(levels)
+    opts.set_capability("goog:loggingPrefs", prefs)
+
+
+def enable_network_log(opts) -> None:
+    """Log the session's DevTools network events, and nothing else.
+
+    Every consumer reads only ``Network.*`` events, so the page-domain events
+    Chrome adds to the performance log by default are turned off.
+    """
+
+    enable_logs(opts, performance="ALL")
+    opts.add_experimental_option(
+        "perfLoggingPrefs", {"enableNetwork": True, "enablePage": False}
+    )
+
+
+def har_seconds() -> int:
+    return env_int("HAR_SECONDS", 60)
+
+
+def read_log(driver, log_type: str) -> list:
+    """Drain one of the session's logs ("browser", "performance")."""
+
+    # webdriver.Remote has no get_log(); the command itself is registered
+    return driver.execute("getLog", {"type": log_type})["value"]
+
+
+class PerformanceLog:
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self._lock = threading.Lock()
+        self._events: deque = deque(maxlen=MAX_EVENTS)
+        self._unclaimed: List[dict] = []  # read, but not yet returned by drain()
+
+    def _read(self, driver) -> None:
+        try:
+            entries = read_log(driver, "performance")
+        except Exception as e:  # e.g. a session without the performance log
+            log.warning("Reading the performance log failed: %s", e)
+            return
+        events = []
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            if message["method"].startswith("Network."):
+                message["timestamp"] = entry["timestamp"]  # ms since the epoch
+                events.append(message)
+        with self._lock:
+            self._unclaimed.extend(events)
+            self._events.extend(events)
+            if self._events:
+                cutoff = self._events[-1]["timestamp"] - self.seconds * 1000
+                while self._events[0]["timestamp"] < cutoff:
+                    self._events.popleft()
+
+    def drain(self, driver) -> List[dict]:
+        """Network events not returned by a previous call, oldest first."""
+
+        self._read(driver)
+        with self._lock:
+            events, self._unclaimed = self._unclaimed, []
+        return events
+
+    def recent(self, driver) -> List[dict]:
+        """Network events of the last ``seconds``, oldest first."""
+
+        self._read(driver)
+        with self._lock:
+            return list(self._events)
+
+    def clear(self) -> None:
+        """Forget the buffered events (:meth:`drain` still returns them)."""
+
+        with self._lock:
+            self._events.clear()
+
+
+_logs: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_logs_lock = threading.Lock()
+
+
+def track_logs(driver, opts) -> None:
+    """Start buffering the performance log of a new session, if it has one."""
+
+    prefs = opts.to_capabilities().get("goog:loggingPrefs", {})
+    if "performance" in prefs:
+        with _logs_lock:
+            _logs[driver] = PerformanceLog(har_seconds())
+
+
+def get_performance_log(driver) -> Optional[PerformanceLog]:
+    """The performance log buffer of ``driver``'s session, None if not logged."""
+
+    with _logs_lock:
+        return _logs.get(driver)
@@ -0,0 +1,239 @@
+"""Record/replay of ``Request.send()`` exchanges ("cassettes").
+
+Modes (``--cassette`` pytest option or ``API_CASSETTE`` env var):
+    off     talk to ``ADDRESS`` as usual (default)
+    record  talk to ``ADDRESS`` and store every exchange in the cassette
+    replay  answer every request from the cassette; never touch the network
+
+A cassette is one gzip-compressed JSON file holding the recorded interactions
+and an index from match key to interaction ids. Interactions are replayed in
+recording order per test and key, so stateful sequences such as
+create -> verify -> delete -> verify replay faithfully.
+
+Matching is configurable:
+    API_CASSETTE_MATCH_ON  request parts in the key (default method,path,params,body)
+    API_CASSETTE_IGNORE    body/param fields whose values are ignored, e.g. the
+                           generated emails and names from user_create_payload()
+
+Each xdist worker records into its own shard next to the cassette; the
+controller merges the shards when the run ends.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from requests import Response
+
+from utils.response_cache import deserialize_response, serialize_response
+from utils.workers import REPO_ROOT, atomic_write, current_test, worker_id
+
+OFF, RECORD, REPLAY = "off", "record", "replay"
+MODES = (OFF, RECORD, REPLAY)
+DEFAULT_PATH = REPO_ROOT / "tests" / "cassettes" / "api.cassette.json.gz"
+DEFAULT_MATCH_ON = ("method", "path", "params", "body")
+DEFAULT_IGNORE = (
+    "name",
+    "email",
+    "password",
+    "title",
+    "birth_date",
+    "birth_month",
+    "birth_year",
+    "firstname",
+    "lastname",
+    "company",
+    "address1",
+    "address2",
+    "zipcode",
+    "state",
+    "city",
+    "mobile_number",
+)
+
+
+class CassetteMiss(RuntimeError):
+    """Raised in replay mode when no recorded interaction matches a request."""
+
+
+def _csv_env(name: str, default: tuple) -> tuple:
+    value = os.environ.get(name)
+    return tuple(v.strip() for v in value.split(",") if v.strip()) if value else default
+
+
+class Cassette:
+    def __init__(
+        self,
+        path: Path,
+        mode: str,
+        match_on: Optional[tuple] = None,
+        ignore: Optional[tuple] = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected {MODES}")
+        self.path = Path(path)
+        self.mode = mode
+        self.match_on = match_on or _csv_env("API_CASSETTE_MATCH_ON", DEFAULT_MATCH_ON)
+        self.ignore = set(ignore or _csv_env("API_CASSETTE_IGNORE", DEFAULT_IGNORE))
+        self._lock = threading.Lock()
+        self._recorded: List[dict] = []
+        self._interactions: List[dict] = []
+        self._by_test = defaultdict(list)
+        self._by_phase = defaultdict(list)
+        self._by_key = defaultdict(list)
+        self._cursors = defaultdict(int)
+        if mode == REPLAY:
+            self._load()
+
+    # --- Matching ------------------------------------------------------------
+    def _mask(self, fields) -> Optional[list]:
+        if not isinstance(fields, dict):
+            return fields
+        return sorted(
+            (k, "<ignored>" if k in self.ignore else str(v)) for k, v in fields.items()
+        )
+
+    def match_key(self, request: dict) -> str:
+        parts = {
+            "method": request["method"],
+            "path": request["path"],
+            "params": self._mask(request["params"]),
+            "body": self._mask(request["body"]),
+        }
+        raw = json.dumps([parts[name] for name in self.match_on], default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+    # --- Replay --------------------------------------------------------------
+    def _load(self) -> None:
+        if not self.path.exists():
+            raise CassetteMiss(f"Cassette {self.path} does not exist; record it first")
+        data = json.loads(gzip.decompress(self.path.read_bytes()))
+        self._interactions = data["interactions"]
+        for key, ids in data["index"].items():
+            for i in ids:
+                interaction = self._interactions[i]
+                self._by_test[(interaction["test"], key)].append(i)
+                self._by_phase[(interaction["phase"], key)].append(i)
+                self._by_key[key].append(i)
+
+    def _replay(self, request: dict) -> Response:
+        key = self.match_key(request)
+        test, phase = current_test()
+        # Prefer the sequence recorded by the same test, then by any test in the
+        # same phase (session fixtures tear down after whichever test ran last),
+        # then anything with the same key
+        scopes = (
+            (self._by_test, (test, key)),
+            (self._by_phase, (phase, key)),
+            (self._by_key, key),
+        )
+        with self._lock:
+            for table, scope in scopes:
+                ids = table.get(scope)
+                if ids:
+                    cursor = self._cursors[scope]
+                    self._cursors[scope] = cursor + 1
+                    # Past the end of a sequence, keep answering with its last item
+                    interaction = self._interactions[ids[min(cursor, len(ids) - 1)]]
+                    break
+            else:
+                raise CassetteMiss(
+                    f"No recorded interaction for {request['method']} "
+                    f"{request['path']} (key {key}) in {self.path}"
+                )
+        response = interaction["response"]
+        return deserialize_response(
+            response["meta"], base64.b64decode(response["body"])
+        )
+
+    # --- Record --------------------------------------------------------------
+    def _record(self, request: dict, response: Response) -> None:
+        meta, body = serialize_response(response)
+        test, phase = current_test()
+        interaction = {
+            "key": self.match_key(request),
+            "test": test,
+            "phase": phase,
+            "request": request,
+            "response": {"meta": meta, "body": base64.b64encode(body).decode()},
+        }
+        with self._lock:
+            self._recorded.append(interaction)
+
+    def shard_path(self, worker: str) -> Path:
+        return self.path.with_name(f"{self.path.name}.{worker}.part")
+
+    def save_shard(self) -> None:
+        """Write what this process recorded; merged later by :func:`merge`."""
+
+        if self.mode != RECORD:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(self._recorded).encode()
+        atomic_write(self.shard_path(worker_id()), data)
+
+    def clear_shards(self) -> None:
+        for shard in self.path.parent.glob(f"{self.path.name}.*.part"):
+            shard.unlink()
+
+    def merge(self) -> int:
+        """Merge all worker shards into the cassette file; return interactions."""
+
+        interactions = []
+        for shard in sorted(self.path.parent.glob(f"{self.path.name}.*.part")):
+            interactions.extend(json.loads(shard.read_bytes()))
+            shard.unlink()
+        index = defaultdict(list)
+        for i, interaction in enumerate(interactions):
+            index[interaction["key"]].append(i)
+        data = {
+            "version": 1,
+            "match_on": list(self.match_on),
+            "ignore": sorted(self.ignore),
+            "index": index,
+            "interactions": interactions,
+        }
+        payload = gzip.compress(json.dumps(data, separators=(",", ":")).encode())
+        atomic_write(self.path, payload)
+        return len(interactions)
+
+    # --- Entry point ---------------------------------------------------------
+    def send(self, request: dict, send: Callable[[], Response]) -> Response:
+        if self.mode == REPLAY:
+            return self._replay(request)
+        response = send()
+        if self.mode == RECORD:
+            self._record(request, response)
+        return response
+
+
+_cassette: Optional[Cassette] = None
+_configured = False
+
+
+def configure_cassette(mode: Optional[str] = None, path: Optional[str] = None):
+    """Select the cassette for this process; options win over env vars."""
+
+    global _cassette, _configured
+    mode = mode or os.environ.get("API_CASSETTE", OFF)
+    path = path or os.environ.get("API_CASSETTE_PATH") or DEFAULT_PATH
+    # Keep the choice visible to xdist workers and helper processes
+    os.environ["API_CASSETTE"] = mode
+    os.environ["API_CASSETTE_PATH"] = str(path)
+    _cassette = None if mode == OFF else Cassette(path, mode)
+    _configured = True
+    return _cassette
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Return the active cassette, configuring it from env vars on first use."""
+
+    if not _configured:
+        configure_cassette()
+    return _cassette
@@ -0,0 +1,234 @@
+"""Per-worker pool of WebDriver sessions.
+
+Creating a ``webdriver.Remote`` session on the grid is the largest fixed cost
+of a UI test. The pool keeps the session of each xdist worker alive between
+tests and hands it out again after a fast reset: extra windows closed, open
+alerts dismissed, cookies and web storage cleared, the viewport restored and
+the tab parked on ``about:blank``.
+
+A session is replaced (quit, and a new one created on the next checkout)
+after ``DRIVER_MAX_USES`` tests, when its test failed, or when the reset
+itself fails, so one broken browser never leaks into the following tests.
+
+Tuning (all optional env vars):
+    DRIVER_POOL       set to ``false`` for a new session per test
+    DRIVER_MAX_USES   tests per session before it is recycled (default 50)
+    BROWSER, HEADLESS, SELENIUM_REMOTE_URL as for the ``driver`` fixture
+    NETWORK_BLOCK, PAGE_LOAD_STRATEGY see ``utils/network_blocking.py``
+    FAILURE_BUNDLE, HAR_SECONDS see ``utils/failure_bundle.py``
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from utils import failure_bundle, network_blocking
+from utils.browser_logs import track_logs
+from utils.workers import Lazy, Stats, env_flag, env_int
+
+log = logging.getLogger(__name__)
+
+VIEWPORT = (2560, 1440)
+
+
+@dataclass
+class DriverPoolStats(Stats):
+    checkouts: int = 0
+    created: int = 0
+    recycled: int = 0
+    discarded: int = 0
+    startup: float = 0.0  # seconds spent creating sessions
+
+    @property
+    def reused(self) -> int:
+        return max(self.checkouts - self.created, 0)
+
+    def summary(self) -> str:
+        return (
+            f"{self.checkouts} checkouts over {self.created} sessions "
+            f"({self.reused} reused, {self.recycled} recycled after max uses, "
+            f"{self.discarded} discarded after a failure), "
+            f"{self.startup:.1f}s starting sessions"
+        )
+
+
+def new_driver():
+    """Start a grid session configured from BROWSER/HEADLESS/SELENIUM_REMOTE_URL."""
+
+    # Imported here: API-only workers never load selenium
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options as ChromeOptions
+
+    browser = os.getenv("BROWSER", "chrome").lower()
+    remote = os.getenv("SELENIUM_REMOTE_URL")
+    headless = os.getenv("HEADLESS", "true").lower() in ("1", "true", "yes")
+
+    # Use ChromeOptions for both Chrome and Opera
+    opts = ChromeOptions()
+    if headless:
+        opts.add_argument("--headless")
+        opts.add_argument("--disable-dev-shm-usage")
+        # Opera-specific tweak for GPU
+        if browser == "opera":
+            opts.add_argument("--disable-gpu")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument(f"--window-size={VIEWPORT[0]},{VIEWPORT[1]}")
+    network_blocking.configure_options(opts)
+    failure_bundle.configure_options(opts)
+
+    driver = webdriver.Remote(command_executor=remote, options=opts)
+    try:
+        driver.set_window_size(*VIEWPORT)
+    except Exception:
+        driver.quit()
+        raise
+    network_blocking.apply_blocking(driver)
+    track_logs(driver, opts)
+    return driver
+
+
+def _origin(url: Optional[str]) -> Optional[str]:
+    parts = urlsplit(url or "")
+    return f"{parts.scheme}://{parts.netloc}" if parts.netloc else None
+
+
+def _clear_browser_data(driver, current_url: str) -> None:
+    """Clear every site's cookies, and storage of ADDRESS and the open page.
+
+    ``delete_all_cookies`` only reaches the open document, so a test ending on
+    another origin or on ``about:blank`` would leave e.g. an injected
+    ``sessionid`` of ADDRESS behind.
+    """
+
+    network_blocking.cdp(driver, "Network.clearBrowserCookies")
+    origins = {_origin(os.environ.get("ADDRESS")), _origin(current_url)}
+    for origin in sorted(o for o in origins if o is not None):
+        network_blocking.cdp(
+            driver,
+            "Storage.clearDataForOrigin",
+            {"origin": origin, "storageTypes": "all"},
+        )
+
+
+def reset_driver(driver) -> None:
+    """Bring a used session back to a fresh-browser state."""
+
+    try:
+        driver.switch_to.alert.dismiss()
+    except Exception:  # NoAlertPresentException: the usual case
+        pass
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    # Storage is per origin: clear it while still on the page under test
+    current = driver.current_url
+    if current.startswith("http"):
+        driver.execute_script(
+            "window.localStorage.clear(); window.sessionStorage.clear();"
+        )
+    try:
+        _clear_browser_data(driver, current)
+    except Exception as e:  # not Chromium: only the open document's cookies
+        log.info("Clearing browser data through DevTools failed (%s)", e)
+        driver.delete_all_cookies()
+    size = driver.get_window_size()
+    if (size["width"], size["height"]) != VIEWPORT:
+        driver.set_window_size(*VIEWPORT)
+    driver.get("about:blank")
+
+
+class DriverPool:
+    def __init__(self, max_uses: Optional[int] = None, factory=new_driver):
+        self.enabled = env_flag("DRIVER_POOL", True)
+        self.max_uses = max_uses or env_int("DRIVER_MAX_USES", 50)
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._idle: List = []
+        self._uses: dict[int, int] = {}
+        self._stats = DriverPoolStats()
+
+    def checkout(self):
+        """Return a reset session from the pool, or a new one."""
+
+        with self._lock:
+            self._stats.checkouts += 1
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                break
+            try:
+                reset_driver(driver)
+                return driver
+            except Exception as e:
+                log.warning("Discarding WebDriver session, reset failed: %s", e)
+                self._quit(driver, "discarded")
+
+        start = time.perf_counter()
+        driver = self._factory()
+        with self._lock:
+            self._stats.created += 1
+            self._stats.startup += time.perf_counter() - start
+            self._uses[id(driver)] = 0
+        return driver
+
+    def checkin(self, driver, failed: bool = False) -> None:
+        """Return ``driver`` after a test; ``failed`` sessions are not reused."""
+
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+            keep = self.enabled and not failed and uses < self.max_uses
+            if keep:
+                self._idle.append(driver)
+                return
+        if failed:
+            self._quit(driver, "discarded")
+        else:
+            self._quit(driver, "recycled" if self.enabled else None)
+
+    def _quit(self, driver, reason: Optional[str]) -> None:
+        with self._lock:
+            self._uses.pop(id(driver), None)
+            if reason:
+                setattr(self._stats, reason, getattr(self._stats, reason) + 1)
+        try:
+            driver.quit()
+        except Exception as e:  # the session may already be gone on the grid
+            log.warning("WebDriver quit failed: %s", e)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._quit(driver, None)
+
+    def stats(self) -> DriverPoolStats:
+        return self._stats
+
+
+_pool = Lazy(DriverPool)
+
+
+def get_driver_pool() -> DriverPool:
+    """Return the WebDriver pool of the current worker process."""
+
+    return _pool.get()
+
+
+def driver_pool_stats() -> DriverPoolStats:
+    # Stats without creating a pool on API-only workers
+    pool = _pool.peek()
+    return pool.stats() if pool is not None else DriverPoolStats()
+
+
+def close_driver_pool() -> None:
+    pool = _pool.peek()
+    if pool is not None:
+        pool.close()
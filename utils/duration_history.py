@@ -0,0 +1,135 @@
+"""Per-test duration history shared by all runs on a machine.
+
+The controller records the setup/call/teardown duration of every test report
+(setup includes fixture costs such as checking out a WebDriver session) and,
+when the session ends, folds them into ``.qa_cache/durations/history.json``
+as exponentially weighted averages. The cost of starting a new browser
+session is kept separately, because with the driver pool only the first test
+of a worker pays it.
+
+The xdist schedulers in ``utils/xdist_scheduling.py`` use the history to hand
+out the longest work first.
+
+Tuning (all optional env vars):
+    DURATION_HISTORY        set to ``false`` to neither record nor use it
+    DURATION_HISTORY_DAYS   drop tests not seen for this many days (default 30)
+"""
+
+import json
+import statistics
+import threading
+import time
+from typing import Dict, Optional
+
+from utils.workers import (
+    Lazy,
+    atomic_write,
+    cache_dir,
+    env_flag,
+    env_int,
+    file_lock,
+)
+
+PHASES = ("setup", "call", "teardown")
+# Weight of the newest run in the moving average
+ALPHA = 0.5
+
+
+def _blend(old: Optional[float], new: float) -> float:
+    return new if old is None else ALPHA * new + (1 - ALPHA) * old
+
+
+class DurationHistory:
+    def __init__(self):
+        self.enabled = env_flag("DURATION_HISTORY", True)
+        self.path = cache_dir("durations") / "history.json"
+        self._lock = threading.Lock()
+        self._run: Dict[str, Dict[str, float]] = {}
+        self._run_fixtures: Dict[str, float] = {}
+        self._tests: Optional[Dict[str, dict]] = None
+        self._fixtures: Dict[str, float] = {}
+
+    # --- Reading --------------------------------------------------------------
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {"tests": {}, "fixtures": {}}
+
+    def _ensure_loaded(self) -> None:
+        if self._tests is None:
+            data = self._load() if self.enabled else {}
+            self._tests = data.get("tests", {})
+            self._fixtures = data.get("fixtures", {})
+
+    def expected(self, nodeid: str) -> Optional[float]:
+        """Expected seconds for ``nodeid`` (all phases), None if never seen."""
+
+        self._ensure_loaded()
+        entry = self._tests.get(nodeid)
+        if entry is None:
+            return None
+        return sum(entry.get(phase, 0.0) for phase in PHASES)
+
+    def fixture_cost(self, name: str) -> float:
+        """Expected one-off seconds of a fixture per worker (e.g. "driver")."""
+
+        self._ensure_loaded()
+        return self._fixtures.get(name, 0.0)
+
+    def weights(self, nodeids) -> Dict[str, float]:
+        """Expected seconds per test; unseen tests count as the median test."""
+
+        known = {n: self.expected(n) for n in nodeids}
+        seen = [d for d in known.values() if d is not None]
+        default = statistics.median(seen) if seen else 1.0
+        # Never zero, so shares of a group stay well defined
+        return {n: max(default if d is None else d, 1e-3) for n, d in known.items()}
+
+    # --- Recording ------------------------------------------------------------
+    def record(self, nodeid: str, when: str, duration: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            phases = self._run.setdefault(nodeid, {})
+            # Reruns add up: they are part of what the test costs
+            phases[when] = phases.get(when, 0.0) + duration
+
+    def record_fixture(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            with self._lock:
+                self._run_fixtures[name] = seconds
+
+    def save(self) -> None:
+        """Fold this run into the history file (under a lock, atomically)."""
+
+        if not self.enabled or not (self._run or self._run_fixtures):
+            return
+        now = time.time()
+        max_age = env_int("DURATION_HISTORY_DAYS", 30) * 86400
+        with file_lock(self.path.with_suffix(".lock")):
+            data = self._load()
+            tests = data.setdefault("tests", {})
+            for nodeid, phases in self._run.items():
+                entry = tests.setdefault(nodeid, {})
+                for when, seconds in phases.items():
+                    entry[when] = round(_blend(entry.get(when), seconds), 4)
+                entry["seen"] = now
+            data["tests"] = {
+                nodeid: entry
+                for nodeid, entry in tests.items()
+                if now - entry.get("seen", now) < max_age
+            }
+            fixtures = data.setdefault("fixtures", {})
+            for name, seconds in self._run_fixtures.items():
+                fixtures[name] = round(_blend(fixtures.get(name), seconds), 4)
+            atomic_write(self.path, json.dumps(data, indent=1).encode())
+        self._run.clear()
+        self._run_fixtures.clear()
+
+
+_history = Lazy(DurationHistory)
+
+
+def get_duration_history() -> DurationHistory:
+    return _history.get()
@@ -5,14 +5,47 @@ actions, and assertions together while maintaining concise call sites via
 class methods.
 """
 
-from typing import Any, List, Optional, Tuple
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver import ActionChains
+from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver, WebElement
 from selenium.webdriver.support import expected_conditions as selenium_ec
 from selenium.webdriver.support.ui import WebDriverWait
 
+# Field spec of extract_records: "text", "textContent", "@attribute", or a
+# (sub-locator, one of those) tuple read from the first match in the element
+FieldSpec = Union[str, Tuple[Tuple[str, str], str]]
+
+_EXTRACT_RECORDS = """
+const [root, how, what, fields] = arguments;
+const findAll = (scope, how, what) => {
+    if (how === "xpath") {
+        const found = document.evaluate(
+            what, scope, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        return Array.from({length: found.snapshotLength}, (_, i) => found.snapshotItem(i));
+    }
+    return Array.from(scope.querySelectorAll(what));
+};
+const read = (el, spec) => {
+    if (!el) return null;
+    if (spec === "text") return el.innerText.trim();
+    if (spec === "textContent") return el.textContent;
+    // Like WebElement.get_attribute: the property if it is a plain value
+    const name = spec.slice(1);
+    const prop = el[name];
+    if (prop !== undefined && prop !== null && typeof prop !== "object") {
+        return String(prop);
+    }
+    return el.getAttribute(name);
+};
+return findAll(root || document, how, what).map((el) => Object.fromEntries(
+    fields.map(([key, sub, spec]) =>
+        [key, read(sub ? findAll(el, sub[0], sub[1])[0] : el, spec)])));
+"""
+
 
 class ExpectedConditions:
     """Collection of reusable Selenium helpers as class methods."""
@@ -478,6 +511,61 @@ class ExpectedConditions:
             return [elem.get_attribute("textContent") for elem in elements]
         return [elem.text for elem in elements]
 
+    @staticmethod
+    def _script_locator(locator: Tuple[str, str]) -> Tuple[str, str]:
+        """A locator as ("css", selector) or ("xpath", expression) for scripts."""
+
+        by, value = locator
+        if by == By.XPATH:
+            return "xpath", value
+        css = {
+            By.CSS_SELECTOR: value,
+            By.ID: f"[id={json.dumps(value)}]",
+            By.NAME: f"[name={json.dumps(value)}]",
+            By.CLASS_NAME: f".{value}",
+            By.TAG_NAME: value,
+        }
+        if by not in css:
+            raise ValueError(f"Locator strategy {by!r} is not supported in scripts")
+        return "css", css[by]
+
+    @classmethod
+    def extract_records(
+        cls,
+        driver: Union[WebDriver, WebElement],
+        locator: Tuple[str, str],
+        fields: Dict[str, FieldSpec],
+    ) -> List[Dict[str, Optional[str]]]:
+        """Read fields of every element matching locator in one browser call.
+
+        Reading elements one WebDriver call at a time costs a round trip per
+        element and property; this runs a single ``execute_script``. Pass an
+        element as ``driver`` to search inside it only. Values are strings
+        (None for a missing sub-element): "text" is the rendered text,
+        "textContent" includes hidden text, "@name" reads an attribute.
+
+        Example:
+            EC.extract_records(driver, CartPage.ROWS, {
+                "id": "@id",
+                "name": (ProductRow.NAME, "text"),
+                "price": (ProductRow.PRICE, "text"),
+            })
+            # -> [{"id": "product-1", "name": "Blue Top", "price": "Rs. 500"}, ...]
+        """
+
+        specs = []
+        for key, spec in fields.items():
+            sub, read = (None, spec) if isinstance(spec, str) else spec
+            if read not in ("text", "textContent") and not read.startswith("@"):
+                raise ValueError(f"Unknown field spec {read!r} for {key!r}")
+            specs.append([key, sub and cls._script_locator(sub), read])
+        how, what = cls._script_locator(locator)
+        if isinstance(driver, WebElement):
+            return driver.parent.execute_script(
+                _EXTRACT_RECORDS, driver, how, what, specs
+            )
+        return driver.execute_script(_EXTRACT_RECORDS, None, how, what, specs)
+
     # --- Display/visibility checks -----------------------------------------
     @staticmethod
     def is_displayed(driver: WebDriver, locator: Tuple[str, str]) -> bool:
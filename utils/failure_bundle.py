@@ -0,0 +1,231 @@
+"""One zip of evidence per failed UI test.
+
+A screenshot alone rarely explains a failure, and the usual answer was a
+rerun. When a test using ``driver`` fails, ``tests/conftest.py`` writes
+``tests/artifacts/failure-<test>-<time>.zip`` holding:
+
+* ``dom.html``: the serialized DOM at the moment of the failure;
+* ``console.log``: the browser console messages since the previous test;
+* ``network.har``: a HAR of the requests of the last ``HAR_SECONDS``, built
+  from the DevTools network events Chrome writes to its performance log
+  (no proxy, no extra round trips while the test runs);
+* ``meta.json``: test id, URL, title, worker and the failure's traceback.
+
+Every part is captured on its own, so a crashed browser still leaves the parts
+that could be read.
+
+Tuning (all optional env vars):
+    FAILURE_BUNDLE  set to ``false`` to not capture bundles
+    HAR_SECONDS     see ``utils/browser_logs.py``
+"""
+
+import json
+import logging
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import parse_qsl, urlsplit
+
+from utils.browser_logs import (
+    enable_logs,
+    enable_network_log,
+    get_performance_log,
+    har_seconds,
+    read_log,
+)
+from utils.workers import Stats, env_flag, worker_id
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class BundleStats(Stats):
+    bundles: int = 0
+    bytes_written: int = 0
+    capture: float = 0.0  # seconds failed tests spent on their bundle
+
+    def summary(self) -> str:
+        return (
+            f"{self.bundles} bundles, {self.bytes_written / 1_000:.0f} kB, "
+            f"{self.capture:.2f}s capturing"
+        )
+
+
+def bundles_enabled() -> bool:
+    return env_flag("FAILURE_BUNDLE", True)
+
+
+def configure_options(opts) -> None:
+    """Have the browser keep the console and network logs bundles need."""
+
+    if not bundles_enabled():
+        return
+    enable_logs(opts, browser="ALL")
+    if har_seconds():
+        enable_network_log(opts)
+
+
+def _headers(headers: dict) -> List[dict]:
+    return [{"name": name, "value": str(value)} for name, value in headers.items()]
+
+
+def _har_entry(record: dict) -> dict:
+    request = record["request"]
+    response = record.get("response", {})
+    size = record.get("size", -1)
+    # DevTools timestamps are monotonic seconds; the wall time is the start only
+    elapsed = max(record.get("end", record["start"]) - record["start"], 0) * 1000
+    entry = {
+        "startedDateTime": datetime.fromtimestamp(
+            record["wall_time"], timezone.utc
+        ).isoformat(),
+        "time": round(elapsed, 3),
+        "request": {
+            "method": request["method"],
+            "url": request["url"],
+            "httpVersion": response.get("protocol", ""),
+            "cookies": [],
+            "headers": _headers(request.get("headers", {})),
+            "queryString": [
+                {"name": name, "value": value}
+                for name, value in parse_qsl(urlsplit(request["url"]).query)
+            ],
+            "headersSize": -1,
+            "bodySize": len(request.get("postData", "")),
+        },
+        "response": {
+            "status": response.get("status", 0),
+            "statusText": response.get("statusText", ""),
+            "httpVersion": response.get("protocol", ""),
+            "cookies": [],
+            "headers": _headers(response.get("headers", {})),
+            "content": {"size": size, "mimeType": response.get("mimeType", "")},
+            "redirectURL": response.get("headers", {}).get("location", ""),
+            "headersSize": -1,
+            "bodySize": size,
+        },
+        "cache": {},
+        "timings": {"send": 0, "wait": round(elapsed, 3), "receive": 0},
+        "_resourceType": record.get("type", ""),
+    }
+    if "postData" in request:
+        entry["request"]["postData"] = {
+            "mimeType": request.get("headers", {}).get("Content-Type", ""),
+            "text": request["postData"],
+        }
+    if "error" in record:
+        entry["response"]["_error"] = record["error"]
+    return entry
+
+
+def build_har(events: List[dict]) -> dict:
+    """HAR 1.2 document from DevTools ``Network.*`` events, oldest first."""
+
+    records: Dict[str, dict] = {}
+    done: List[dict] = []
+    for event in events:
+        method, params = event["method"], event["params"]
+        record = records.get(params.get("requestId"))
+        if method == "Network.requestWillBeSent":
+            if record is not None and "redirectResponse" in params:
+                # Redirects reuse the request id: close the previous hop
+                record["response"] = params["redirectResponse"]
+                record["end"] = params["timestamp"]
+                done.append(records.pop(params["requestId"]))
+            records[params["requestId"]] = {
+                "request": params["request"],
+                "start": params["timestamp"],
+                "wall_time": params["wallTime"],
+                "type": params.get("type", ""),
+            }
+        elif record is None:
+            continue  # started before the buffer's window
+        elif method == "Network.responseReceived":
+            record["response"] = params["response"]
+        elif method == "Network.loadingFinished":
+            record["end"] = params["timestamp"]
+            record["size"] = params.get("encodedDataLength", -1)
+        elif method == "Network.loadingFailed":
+            record["end"] = params["timestamp"]
+            record["error"] = params.get("blockedReason") or params["errorText"]
+    done.extend(records.values())
+    done.sort(key=lambda record: record["start"])
+    return {
+        "log": {
+            "version": "1.2",
+            "creator": {"name": "qa-demo-repository", "version": "1.0"},
+            "pages": [],
+            "entries": [_har_entry(record) for record in done],
+        }
+    }
+
+
+def _console_text(entries: List[dict]) -> str:
+    lines = []
+    for entry in entries:
+        stamp = datetime.fromtimestamp(entry["timestamp"] / 1000, timezone.utc)
+        lines.append(f"{stamp.isoformat()} {entry['level']} {entry['message']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_bundle(driver, report, directory: Path) -> Path:
+    """Capture the evidence of ``report``'s failure into one zip; return its path."""
+
+    start = time.perf_counter()
+    parts: Dict[str, str] = {}
+    meta = {
+        "nodeid": report.nodeid,
+        "when": report.when,
+        "worker": worker_id(),
+        "time": datetime.now(timezone.utc).isoformat(),
+        "longrepr": str(report.longrepr),
+    }
+    captures = {
+        "url": lambda: driver.current_url,
+        "title": lambda: driver.title,
+        "dom.html": lambda: driver.page_source,
+        "console.log": lambda: _console_text(read_log(driver, "browser")),
+        "network.har": lambda: json.dumps(_har(driver), indent=1),
+    }
+    for name, capture in captures.items():
+        try:
+            value = capture()
+        except Exception as e:  # a dead session still leaves the other parts
+            log.warning("Failure bundle: capturing %s failed: %s", name, e)
+            meta.setdefault("errors", {})[name] = str(e)
+            continue
+        if "." in name:
+            parts[name] = value
+        else:
+            meta[name] = value
+    parts["meta.json"] = json.dumps(meta, indent=1)
+
+    safe = report.nodeid.replace("::", "_").replace("/", "_")
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = directory / f"failure-{safe}-{stamp}.zip"
+    directory.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for name, text in parts.items():
+            bundle.writestr(name, text)
+    with _lock:
+        _stats.bundles += 1
+        _stats.bytes_written += path.stat().st_size
+        _stats.capture += time.perf_counter() - start
+    return path
+
+
+def _har(driver) -> dict:
+    perf_log = get_performance_log(driver)
+    return build_har(perf_log.recent(driver) if perf_log is not None else [])
+
+
+_stats = BundleStats()
+_lock = threading.Lock()
+
+
+def bundle_stats() -> BundleStats:
+    return _stats
@@ -0,0 +1,374 @@
+"""Map tests to the page objects and locators they use; select impacted tests.
+
+Recording: while a test runs, every ``EC`` call (``utils/expected_conditions``)
+notes the locator it got and the page-object, component and helper files on
+the call stack. A locator is named after the constant that defines it, e.g.
+``pages/cart.py::ProductRow.NAME``; locators built on the fly only count for
+their file. At session end each process merges what its tests used into
+``.qa_cache/impact/map.json`` (``IMPACT_MAP`` overrides the path).
+
+Selection: ``pytest --impacted-since REF`` runs only the tests affected by the
+files changed since the git ref ``REF`` (working tree and untracked files
+included):
+
+* a changed test module selects its own tests;
+* a change in ``pages/``, ``components/`` or ``helper_functions_for_tests/``
+  selects the tests that used the changed locator constants if only locator
+  definitions changed, otherwise every test that used the file. A test also
+  counts as using every tracked file its module imports (directly or through
+  other tracked files), which covers helpers that never reach ``EC``; of
+  those, a locator-only change selects the tests whose recorded calls never
+  went through the file;
+* documentation, CI files and test artifacts select nothing;
+* any other change (``utils/``, conftest, dependencies, ...) selects every
+  test, and so does a test the map has never seen.
+
+Tuning (all optional env vars):
+    IMPACT_RECORD  set to ``false`` to not record the map
+    IMPACT_MAP     map file (default .qa_cache/impact/map.json)
+"""
+
+import ast
+import functools
+import inspect
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from utils.workers import (
+    REPO_ROOT,
+    Lazy,
+    atomic_write,
+    cache_dir,
+    env_flag,
+    file_lock,
+)
+
+TRACKED_DIRS = ("pages/", "components/", "helper_functions_for_tests/")
+IGNORED_PREFIXES = (".github/", "loadtests/", "tests/artifacts/")
+IGNORED_SUFFIXES = (".md",)
+IGNORED_FILES = ("LICENSE",)
+
+_HUNK = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@", re.M)
+
+
+def map_path() -> Path:
+    custom = os.environ.get("IMPACT_MAP")
+    return Path(custom) if custom else cache_dir("impact") / "map.json"
+
+
+@functools.lru_cache(maxsize=None)
+def _relpath(filename: str) -> Optional[str]:
+    try:
+        return Path(filename).resolve().relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return None
+
+
+def _tracked(relpath: Optional[str]) -> bool:
+    return relpath is not None and relpath.startswith(TRACKED_DIRS)
+
+
+# ---- Recording ------------------------------------------------------------------
+
+
+class ImpactRecorder:
+    def __init__(self):
+        self.enabled = env_flag("IMPACT_RECORD", True)
+        self._lock = threading.Lock()
+        self._current: Optional[str] = None
+        self._tests: Dict[str, Dict[str, Set[str]]] = {}
+        self._locators: Optional[Dict[tuple, List[str]]] = None
+        self._installed = False
+
+    def begin(self, nodeid: str) -> None:
+        """Attribute EC calls to ``nodeid`` from now on (any thread)."""
+
+        if self.enabled:
+            with self._lock:
+                self._current = nodeid
+                self._tests[nodeid] = {"files": set(), "locators": set()}
+
+    def forget(self, nodeid: str) -> None:
+        """Drop a test whose setup failed: it used less than it would have."""
+
+        with self._lock:
+            self._tests.pop(nodeid, None)
+
+    def install(self) -> None:
+        """Wrap the ``EC`` helpers; called when the first browser is needed."""
+
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._installed:
+                return
+            from utils.expected_conditions import ExpectedConditions
+
+            for name, attr in list(vars(ExpectedConditions).items()):
+                if name.startswith("_"):
+                    continue
+                if isinstance(attr, staticmethod):
+                    wrapped = staticmethod(self._wrap(attr.__func__))
+                elif isinstance(attr, classmethod):
+                    wrapped = classmethod(self._wrap(attr.__func__))
+                else:
+                    continue
+                setattr(ExpectedConditions, name, wrapped)
+            self._installed = True
+
+    def _wrap(self, func):
+        def recording(*args, **kwargs):
+            self._note(args, kwargs)
+            return func(*args, **kwargs)
+
+        recording.__wrapped__ = func
+        recording.__name__ = func.__name__
+        recording.__doc__ = func.__doc__
+        return recording
+
+    def _locator_index(self) -> Dict[tuple, List[str]]:
+        # Locator tuples defined as class or module constants of tracked files
+        if self._locators is None:
+            index: Dict[tuple, List[str]] = {}
+            for module in list(sys.modules.values()):
+                relpath = _relpath(getattr(module, "__file__", None) or "")
+                if not _tracked(relpath):
+                    continue
+                owners = [("", module)] + [
+                    (f"{cls.__name__}.", cls)
+                    for cls in vars(module).values()
+                    if inspect.isclass(cls) and cls.__module__ == module.__name__
+                ]
+                for prefix, owner in owners:
+                    for attr, value in vars(owner).items():
+                        if _is_locator(value):
+                            index.setdefault(tuple(value), []).append(
+                                f"{relpath}::{prefix}{attr}"
+                            )
+            self._locators = index
+        return self._locators
+
+    def _note(self, args, kwargs) -> None:
+        nodeid = self._current
+        if nodeid is None:
+            return
+        files, locators = set(), set()
+        frame = sys._getframe(2)
+        while frame is not None:
+            relpath = _relpath(frame.f_code.co_filename)
+            if _tracked(relpath):
+                files.add(relpath)
+            frame = frame.f_back
+        for value in _locators_in(list(args) + list(kwargs.values())):
+            for name in self._locator_index().get(tuple(value), ()):
+                locators.add(name)
+                files.add(name.split("::", 1)[0])
+        with self._lock:
+            entry = self._tests.setdefault(nodeid, {"files": set(), "locators": set()})
+            entry["files"] |= files
+            entry["locators"] |= locators
+
+    def save(self) -> None:
+        """Merge this process' tests into the map; fresh entries replace old ones."""
+
+        if not self.enabled or not self._tests:
+            return
+        path = map_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(path.with_suffix(".lock")):
+            data = load_map(path)
+            for nodeid, entry in self._tests.items():
+                data[nodeid] = {key: sorted(values) for key, values in entry.items()}
+            atomic_write(path, json.dumps(data, indent=1, sort_keys=True).encode())
+        self._tests.clear()
+
+
+def _is_locator(value) -> bool:
+    return (
+        isinstance(value, tuple)
+        and len(value) == 2
+        and all(isinstance(part, str) for part in value)
+    )
+
+
+def _locators_in(values: Iterable) -> Iterator[tuple]:
+    """Locators among ``values``, also inside dicts and tuples (field specs)."""
+
+    for value in values:
+        if _is_locator(value):
+            yield value
+        elif isinstance(value, dict):
+            yield from _locators_in(value.values())
+        elif isinstance(value, tuple):
+            yield from _locators_in(value)
+
+
+def load_map(path: Optional[Path] = None) -> Dict[str, dict]:
+    try:
+        return json.loads((path or map_path()).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+_recorder = Lazy(ImpactRecorder)
+
+
+def get_impact_recorder() -> ImpactRecorder:
+    return _recorder.get()
+
+
+# ---- Selection ------------------------------------------------------------------
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=REPO_ROOT, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def verify_ref(ref: str) -> None:
+    """Raise ValueError unless ``ref`` names a commit of this repository."""
+
+    try:
+        _git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}")
+    except (OSError, subprocess.CalledProcessError):
+        raise ValueError(f"--impacted-since: {ref!r} is not a git commit here")
+
+
+def changed_files(ref: str) -> List[str]:
+    """Files that differ from ``ref`` in the working tree, plus untracked ones."""
+
+    diff = _git("diff", "--name-only", ref, "--").splitlines()
+    untracked = _git("ls-files", "--others", "--exclude-standard").splitlines()
+    return sorted(set(diff) | set(untracked))
+
+
+def _constant_ranges(source: str) -> List[tuple]:
+    """(first line, last line, name) of the locator constants of a module."""
+
+    ranges = []
+
+    def visit(body, prefix: str):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                visit(node.body, f"{prefix}{node.name}.")
+            elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Tuple):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        name = f"{prefix}{target.id}"
+                        ranges.append((node.lineno, node.end_lineno, name))
+
+    visit(ast.parse(source).body, "")
+    return ranges
+
+
+def changed_locators(ref: str, relpath: str) -> Optional[Set[str]]:
+    """Locator constants touched in ``relpath``; None if anything else changed."""
+
+    path = REPO_ROOT / relpath
+    if not path.exists():
+        return None
+    try:
+        ranges = _constant_ranges(path.read_text())
+    except SyntaxError:
+        return None
+    names = set()
+    for match in _HUNK.finditer(_git("diff", "-U0", ref, "--", relpath)):
+        start = int(match.group(1))
+        count = int(match.group(2) or 1)
+        # A pure deletion (count 0) sits between lines: treat it as a line
+        lines = range(start, start + max(count, 1))
+        for line in lines:
+            hit = [name for first, last, name in ranges if first <= line <= last]
+            if not hit:
+                return None
+            names.update(f"{relpath}::{name}" for name in hit)
+    # No hunks: an untracked file, or a mode-only change
+    return names or None
+
+
+def _module_file(module: str) -> Optional[str]:
+    base = REPO_ROOT.joinpath(*module.split("."))
+    for path in (base.with_suffix(".py"), base / "__init__.py"):
+        if path.is_file():
+            return path.relative_to(REPO_ROOT).as_posix()
+    return None
+
+
+def _imports(relpath: str) -> Set[str]:
+    """Repository files ``relpath`` imports directly."""
+
+    try:
+        tree = ast.parse((REPO_ROOT / relpath).read_text())
+    except (OSError, SyntaxError):
+        return set()
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+            # ``from pages import cart`` imports a submodule
+            modules += [f"{node.module}.{alias.name}" for alias in node.names]
+    return {f for f in map(_module_file, modules) if f is not None}
+
+
+@functools.lru_cache(maxsize=None)
+def imported_files(relpath: str) -> frozenset:
+    """Tracked files a test module imports, directly or through tracked files."""
+
+    found: Set[str] = set()
+    pending = [relpath]
+    while pending:
+        for imported in _imports(pending.pop()):
+            if _tracked(imported) and imported not in found:
+                found.add(imported)
+                pending.append(imported)
+    return frozenset(found)
+
+
+def impacted(nodeids: Iterable[str], ref: str) -> Set[str]:
+    """The subset of ``nodeids`` affected by the changes since ``ref``."""
+
+    nodeids = list(nodeids)
+    impact_map = load_map()
+    selected: Set[str] = set()
+    files_changed, locators_changed = set(), set()
+    for relpath in changed_files(ref):
+        name = relpath.rsplit("/", 1)[-1]
+        if relpath.startswith(IGNORED_PREFIXES) or relpath.endswith(IGNORED_SUFFIXES):
+            continue
+        if name in IGNORED_FILES:
+            continue
+        if relpath.startswith("tests/") and name.startswith("test_"):
+            selected.update(n for n in nodeids if n.split("::", 1)[0] == relpath)
+        elif _tracked(relpath):
+            locators = changed_locators(ref, relpath)
+            if locators is None:
+                files_changed.add(relpath)
+            else:
+                locators_changed |= locators
+        else:
+            return set(nodeids)  # shared code or config: everything may break
+    locator_files = {name.split("::", 1)[0] for name in locators_changed}
+
+    for nodeid in nodeids:
+        entry = impact_map.get(nodeid)
+        if entry is None:
+            selected.add(nodeid)  # never recorded: can't tell
+            continue
+        imported = imported_files(nodeid.split("::", 1)[0])
+        if files_changed & (set(entry["files"]) | imported):
+            selected.add(nodeid)
+        elif locators_changed.intersection(entry["locators"]):
+            selected.add(nodeid)
+        elif (locator_files & imported) - set(entry["files"]):
+            # Used without EC calls, so its locators were never recorded
+            selected.add(nodeid)
+    return selected
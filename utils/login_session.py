@@ -0,0 +1,202 @@
+"""Log in over HTTP and hand the session cookies to a browser.
+
+Filling the login form costs a page load, three element interactions and the
+redirect. Tests that only need to *be* logged in use
+:meth:`pages.login_page.LoginPage.login_via_http` instead, which relies on
+this module:
+
+* :func:`http_login` GETs the login page for the CSRF token, POSTs the form
+  like the browser would and keeps the cookies it answers with (always over
+  the network, also under ``--cassette replay``);
+  :meth:`LoginCache.cookies` caches them
+  per user in this worker until the earliest of them expires (or
+  ``LOGIN_COOKIE_TTL`` seconds for session cookies), so every later test of a
+  session-scoped ``user_api`` account skips the HTTP login too;
+* :func:`inject_cookies` sets them in the browser with DevTools
+  ``Network.setCookies``, which works from ``about:blank`` and so saves the
+  page load ``add_cookie`` needs. Other browsers fall back to ``add_cookie``.
+
+A cached session the server no longer accepts (logged out, expired early) is
+detected by the page object, dropped with :meth:`LoginCache.forget` and
+replaced by a fresh login.
+
+Tuning (all optional env vars):
+    LOGIN_COOKIE_TTL   seconds to reuse cookies without an expiry (default 1800)
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from urllib.parse import urljoin
+
+from utils.network_blocking import cdp
+from utils.request_builder import Request, RequestMethod
+from utils.workers import Lazy, Stats, env_int
+
+log = logging.getLogger(__name__)
+
+_CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken"\s+value="([^"]+)"')
+# Cookies are dropped this long before they expire, so none dies mid-test
+EXPIRY_MARGIN = 60
+
+
+@dataclass
+class LoginStats(Stats):
+    http_logins: int = 0
+    reused: int = 0  # logins served from the cookie cache
+    rejected: int = 0  # cached sessions the server no longer accepted
+
+    def summary(self) -> str:
+        return (
+            f"{self.http_logins} HTTP logins, {self.reused} reused from the cache, "
+            f"{self.rejected} cached sessions rejected"
+        )
+
+
+def response_cookies(response) -> List[dict]:
+    """The cookies a ``requests`` response set, as Selenium cookie dicts."""
+
+    return [_cookie(cookie) for cookie in response.cookies]
+
+
+def _cookie(cookie) -> dict:
+    """A ``requests`` cookie as a Selenium cookie dict."""
+
+    data = {
+        "name": cookie.name,
+        "value": cookie.value,
+        "path": cookie.path or "/",
+        "secure": bool(cookie.secure),
+        "httpOnly": cookie.has_nonstandard_attr("HttpOnly"),
+    }
+    if cookie.expires:
+        data["expiry"] = int(cookie.expires)
+    return data
+
+
+def http_login(login_url: str, email: str, password: str) -> List[dict]:
+    """Submit the login form over HTTP; return the session cookies."""
+
+    base = urljoin(login_url, "/")
+    # Live: the cookies end up in a real browser, a replayed session is useless
+    form = Request(RequestMethod.GET, domain=base).path("/login").live().send()
+    match = _CSRF_INPUT.search(form.text)
+    csrf = form.cookies.get("csrftoken")
+    if match is None or csrf is None:
+        raise RuntimeError(f"No CSRF token on {login_url} (HTTP {form.status_code})")
+    response = (
+        Request(RequestMethod.POST, domain=base)
+        .path("/login")
+        .headers({"Referer": login_url})
+        .cookies(csrftoken=csrf)
+        .data(
+            {
+                "csrfmiddlewaretoken": match.group(1),
+                "email": email,
+                "password": password,
+            }
+        )
+        .allow_redirects(False)
+        .live()
+        .send()
+    )
+    # Success redirects home with a session; a wrong password re-renders the form
+    if "sessionid" not in response.cookies:
+        raise RuntimeError(
+            f"HTTP login of {email} failed (HTTP {response.status_code}, no session)"
+        )
+    cookies = {c.name: _cookie(c) for c in form.cookies}
+    cookies.update({c.name: _cookie(c) for c in response.cookies})
+    return list(cookies.values())
+
+
+class LoginCache:
+    def __init__(self):
+        self.ttl = env_int("LOGIN_COOKIE_TTL", 1800)
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Tuple[List[dict], float]] = {}
+        self._stats = LoginStats()
+
+    def cookies(
+        self, login_url: str, email: str, password: str, refresh: bool = False
+    ) -> List[dict]:
+        """Cookies of a logged-in session of ``email``, cached until they expire."""
+
+        key = (urljoin(login_url, "/"), email)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not refresh and entry[1] > now:
+                self._stats.reused += 1
+                return entry[0]
+        cookies = http_login(login_url, email, password)
+        expiries = [c["expiry"] for c in cookies if "expiry" in c]
+        expires = min(expiries, default=now + self.ttl) - EXPIRY_MARGIN
+        with self._lock:
+            self._entries[key] = (cookies, expires)
+            self._stats.http_logins += 1
+        return cookies
+
+    def forget(self, email: str, rejected: bool = False) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == email]:
+                del self._entries[key]
+            if rejected:
+                self._stats.rejected += 1
+
+    def stats(self) -> LoginStats:
+        return self._stats
+
+
+def inject_cookies(driver, url: str, cookies: List[dict]) -> None:
+    """Set ``cookies`` for ``url``'s site in the browser, before opening it."""
+
+    devtools = [
+        {
+            "name": c["name"],
+            "value": c["value"],
+            "url": urljoin(url, "/"),
+            "path": c["path"],
+            "secure": c["secure"],
+            "httpOnly": c["httpOnly"],
+            **({"expires": c["expiry"]} if "expiry" in c else {}),
+        }
+        for c in cookies
+    ]
+    try:
+        cdp(driver, "Network.setCookies", {"cookies": devtools})
+        return
+    except Exception as e:  # not Chromium: cookies need the site open
+        log.info("Network.setCookies unavailable (%s), using add_cookie", e)
+    if not driver.current_url.startswith(urljoin(url, "/")):
+        driver.get(urljoin(url, "/robots.txt"))  # cheapest page of the site
+    for cookie in cookies:
+        driver.add_cookie(cookie)
+
+
+def browser_cookies(driver, url: str) -> Dict[str, str]:
+    """Name -> value of the browser's cookies for ``url``'s site."""
+
+    try:
+        result = cdp(driver, "Network.getCookies", {"urls": [urljoin(url, "/")]})
+        return {c["name"]: c["value"] for c in result["cookies"]}
+    except Exception as e:  # not Chromium: only the open site's cookies
+        log.info("Network.getCookies unavailable (%s), using get_cookies", e)
+    return {c["name"]: c["value"] for c in driver.get_cookies()}
+
+
+_cache = Lazy(LoginCache)
+
+
+def get_login_cache() -> LoginCache:
+    """Return the login cookie cache of the current worker process."""
+
+    return _cache.get()
+
+
+def login_stats() -> LoginStats:
+    cache = _cache.peek()
+    return cache.stats() if cache is not None else LoginStats()
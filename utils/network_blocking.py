@@ -0,0 +1,204 @@
+"""Block ads, trackers and heavy assets in the browser through the DevTools protocol.
+
+Every ``driver.get`` on the shop waits for a long tail of ad, analytics and
+third-party requests the tests never look at. When a session is created,
+:func:`apply_blocking` sends ``Network.setBlockedURLs`` with the URL patterns
+of the selected profile, so Chrome fails those requests at once instead of
+downloading them:
+
+* ``off``  - block nothing
+* ``ads``  - ad networks and trackers (default)
+* ``lean`` - ``ads`` plus images and web fonts; pages load fastest, but tests
+  that look at images (size, clicks) may fail
+
+The consent manager (Google Funding Choices) stays reachable in every
+profile: :class:`components.consent_popup.ConsentPopup` and the tests behind
+it need the real dialog.
+
+Blocked requests show up as ``Network.loadingFailed`` events in the browser's
+performance log (``utils/browser_logs.py``). :func:`collect` counts them after
+every test, together with an estimate of the bytes they would have cost, by
+resource type.
+
+The page-load strategy decides what ``driver.get`` waits for: ``normal`` (the
+``load`` event), ``eager`` (``DOMContentLoaded``) or ``none``.
+
+Tuning (all optional env vars):
+    NETWORK_BLOCK          profile name: off, ads or lean (default ads)
+    NETWORK_BLOCK_EXTRA    comma-separated extra URL patterns (``*`` wildcards)
+    PAGE_LOAD_STRATEGY     normal, eager or none (default normal)
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from utils.browser_logs import enable_network_log, get_performance_log
+from utils.workers import Stats
+
+log = logging.getLogger(__name__)
+
+AD_PATTERNS = (
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googleadservices.com*",
+    "*adservice.google.*",
+    "*googletagservices.com*",
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*amazon-adsystem.com*",
+    "*adnxs.com*",
+    "*criteo.com*",
+    "*criteo.net*",
+    "*taboola.com*",
+    "*outbrain.com*",
+    "*facebook.net*",
+    "*hotjar.com*",
+    "*scorecardresearch.com*",
+)
+ASSET_PATTERNS = (
+    "*.png*",
+    "*.jpg*",
+    "*.jpeg*",
+    "*.gif*",
+    "*.webp*",
+    "*.svg*",
+    "*.ico*",
+    "*.woff*",
+    "*.ttf*",
+    "*.otf*",
+    "*.eot*",
+)
+PROFILES: Dict[str, Tuple[str, ...]] = {
+    "off": (),
+    "ads": AD_PATTERNS,
+    "lean": AD_PATTERNS + ASSET_PATTERNS,
+}
+PAGE_LOAD_STRATEGIES = ("normal", "eager", "none")
+
+# Typical transfer size per DevTools resource type, for the bytes-saved estimate
+TYPICAL_BYTES = {
+    "Document": 40_000,
+    "Script": 60_000,
+    "Image": 25_000,
+    "Font": 35_000,
+    "Stylesheet": 20_000,
+    "XHR": 3_000,
+    "Fetch": 3_000,
+}
+DEFAULT_BYTES = 5_000
+
+# chromedriver's DevTools endpoint; webdriver.Remote does not register it
+_CDP_COMMAND = ("POST", "/session/$sessionId/goog/cdp/execute")
+
+
+@dataclass
+class NetworkStats(Stats):
+    sessions: int = 0  # sessions with a blocklist applied
+    blocked: int = 0
+    bytes_saved: int = 0  # estimated
+    unavailable: int = 0  # sessions that refused the blocklist
+
+    def summary(self) -> str:
+        text = (
+            f"{self.blocked} requests blocked in {self.sessions} sessions, "
+            f"~{self.bytes_saved / 1_000_000:.1f} MB not downloaded"
+        )
+        if self.unavailable:
+            text += f", blocking unavailable in {self.unavailable} sessions"
+        return text
+
+
+def profile_name() -> str:
+    name = os.getenv("NETWORK_BLOCK", "ads").lower()
+    if name not in PROFILES:
+        raise ValueError(
+            f"NETWORK_BLOCK={name!r}: expected one of {', '.join(PROFILES)}"
+        )
+    return name
+
+
+def blocked_patterns() -> List[str]:
+    extra = os.getenv("NETWORK_BLOCK_EXTRA", "")
+    patterns = list(PROFILES[profile_name()])
+    patterns += [p.strip() for p in extra.split(",") if p.strip()]
+    return patterns
+
+
+def page_load_strategy() -> str:
+    strategy = os.getenv("PAGE_LOAD_STRATEGY", "normal").lower()
+    if strategy not in PAGE_LOAD_STRATEGIES:
+        raise ValueError(
+            f"PAGE_LOAD_STRATEGY={strategy!r}: expected one of "
+            f"{', '.join(PAGE_LOAD_STRATEGIES)}"
+        )
+    return strategy
+
+
+def configure_options(opts) -> None:
+    """Set the page-load strategy and, if blocking, the performance log."""
+
+    opts.page_load_strategy = page_load_strategy()
+    if blocked_patterns():
+        enable_network_log(opts)
+
+
+def cdp(driver, cmd: str, params: Optional[dict] = None) -> dict:
+    """Run a DevTools command on a (remote) Chromium session."""
+
+    executor = driver.command_executor
+    if executor.get_command("executeCdpCommand") is None:
+        executor.add_command("executeCdpCommand", *_CDP_COMMAND)
+    response = driver.execute("executeCdpCommand", {"cmd": cmd, "params": params or {}})
+    return response["value"]
+
+
+def apply_blocking(driver) -> None:
+    """Install the blocklist on a new session; it lasts for the session.
+
+    A browser without DevTools (not Chromium, or a grid that does not forward
+    CDP) keeps running unblocked.
+    """
+
+    patterns = blocked_patterns()
+    if not patterns:
+        return
+    try:
+        cdp(driver, "Network.enable")
+        cdp(driver, "Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        log.warning("Network blocking unavailable in this session: %s", e)
+        with _lock:
+            _stats.unavailable += 1
+        return
+    with _lock:
+        _stats.sessions += 1
+
+
+def collect(driver) -> None:
+    """Count the requests blocked since the last call (drains the log)."""
+
+    perf_log = get_performance_log(driver)
+    if perf_log is None:
+        return
+    blocked = saved = 0
+    for event in perf_log.drain(driver):
+        if event["method"] != "Network.loadingFailed":
+            continue
+        params = event["params"]
+        if params.get("blockedReason") == "inspector":
+            blocked += 1
+            saved += TYPICAL_BYTES.get(params.get("type"), DEFAULT_BYTES)
+    with _lock:
+        _stats.blocked += blocked
+        _stats.bytes_saved += saved
+
+
+_stats = NetworkStats()
+_lock = threading.Lock()
+
+
+def network_stats() -> NetworkStats:
+    return _stats
@@ -1,8 +1,40 @@
-from dataclasses import dataclass, field
+"""Test data for account payloads.
+
+``PayloadFactory`` builds ``createAccount`` payloads without calling Faker per
+user. Faker fills a bank of values once (lazily, on first use) and the bank is
+cached under ``.qa_cache/payloads`` for later runs and other workers; each
+payload then combines bank entries picked by a seeded RNG.
 
-from faker import Faker
+* Deterministic: the RNG is seeded from ``PAYLOAD_SEED`` and the worker id, so a
+  worker produces the same names and addresses on every run.
+* Unique: emails carry a namespace of the run, the worker and a counter, so
+  they never collide across xdist workers or with accounts of earlier runs.
 
-fake = Faker("pl_PL")
+Tuning (all optional env vars):
+    PAYLOAD_SEED       base seed (default 0)
+    PAYLOAD_BANK_SIZE  values generated per field (default 256)
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import random
+import string
+import threading
+import unicodedata
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from utils.workers import (
+    Lazy,
+    atomic_write,
+    cache_dir,
+    env_int,
+    file_lock,
+    worker_id,
+)
 
 
 @dataclass
@@ -13,29 +45,124 @@ class User:
     other: dict = field(default_factory=dict)
 
 
-def user_create_payload():
-    birth_date = fake.date_of_birth(minimum_age=18, maximum_age=70)
-    address1 = fake.street_address()
-    # address2: same as address1 but with a small tweak (e.g., add apt/lokal info)
-    address2 = address1 + f" / {fake.random_int(min=1, max=50)}"
-    name = fake.first_name()
-    state = fake.city()
-    return {
-        "name": name,
-        "email": fake.unique.email(),
-        "password": fake.password(length=12),
-        "title": fake.random_element(["Mr", "Mrs", "Miss"]),
-        "birth_date": birth_date.day,
-        "birth_month": birth_date.month,
-        "birth_year": birth_date.year,
-        "firstname": name,
-        "lastname": fake.last_name(),
-        "company": fake.company(),
-        "address1": address1,
-        "address2": address2,
-        "country": "Poland",
-        "zipcode": fake.postcode(),
-        "state": state,  # Use city as region if API requires 'state'
-        "city": state,
-        "mobile_number": fake.phone_number(),
+LOCALE = "pl_PL"
+TITLES = ("Mr", "Mrs", "Miss")
+PASSWORD_CHARS = string.ascii_letters + string.digits + "!@#$%"
+
+
+def _generate_bank(locale: str, size: int, seed: int) -> dict:
+    from faker import Faker  # slow import, only paid when the bank is missing
+
+    fake = Faker(locale)
+    fake.seed_instance(seed)
+    fields = {
+        "first_name": fake.first_name,
+        "last_name": fake.last_name,
+        "company": fake.company,
+        "street_address": fake.street_address,
+        "city": fake.city,
+        "postcode": fake.postcode,
+        "phone_number": fake.phone_number,
+        "email_domain": fake.free_email_domain,
+        "birth_date": lambda: fake.date_of_birth(
+            minimum_age=18, maximum_age=70
+        ).isoformat(),
     }
+    return {name: [make() for _ in range(size)] for name, make in fields.items()}
+
+
+def _slug(text: str) -> str:
+    # Emails must stay ASCII: "Łucja Wójcik" -> "lucjawojcik"
+    text = text.replace("ł", "l").replace("Ł", "L")
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return "".join(c for c in text.lower() if c.isalnum())
+
+
+def _run_token() -> str:
+    # Shared by all workers of one xdist run, fresh for every run
+    run = os.environ.get("PYTEST_XDIST_TESTRUNUID") or uuid.uuid4().hex
+    return run[:8]
+
+
+class PayloadFactory:
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        worker: Optional[str] = None,
+        bank_size: Optional[int] = None,
+        locale: str = LOCALE,
+    ):
+        self.seed = env_int("PAYLOAD_SEED", 0) if seed is None else seed
+        self.worker = worker or worker_id()
+        self.bank_size = bank_size or env_int("PAYLOAD_BANK_SIZE", 256)
+        self.locale = locale
+        self.namespace = f"{_run_token()}{self.worker}"
+        worker_seed = hashlib.sha256(f"{self.seed}:{self.worker}".encode()).digest()
+        self._rng = random.Random(worker_seed)
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._bank: Optional[dict] = None
+
+    @property
+    def bank(self) -> dict:
+        """Faker-generated values, loaded (or generated and cached) on first use."""
+
+        if self._bank is None:
+            name = f"bank-{self.locale}-{self.seed}-{self.bank_size}.json"
+            path = cache_dir("payloads") / name
+            with file_lock(path.with_suffix(".lock")):
+                if not path.exists():
+                    bank = _generate_bank(self.locale, self.bank_size, self.seed)
+                    atomic_write(path, json.dumps(bank).encode())
+                self._bank = json.loads(path.read_text())
+        return self._bank
+
+    def user(self) -> dict:
+        """One ``createAccount`` payload with a unique email."""
+
+        bank = self.bank
+        with self._lock:  # the RNG sequence stays deterministic across threads
+            pick = {key: self._rng.choice(values) for key, values in bank.items()}
+            password = "".join(self._rng.choices(PASSWORD_CHARS, k=12))
+            title = self._rng.choice(TITLES)
+            apartment = self._rng.randint(1, 50)
+            n = next(self._counter)
+        first, last = pick["first_name"], pick["last_name"]
+        year, month, day = (int(part) for part in pick["birth_date"].split("-"))
+        local = f"{_slug(first)}.{_slug(last)}.{self.namespace}.{n}"
+        return {
+            "name": first,
+            "email": f"{local}@{pick['email_domain']}",
+            "password": password,
+            "title": title,
+            "birth_date": day,
+            "birth_month": month,
+            "birth_year": year,
+            "firstname": first,
+            "lastname": last,
+            "company": pick["company"],
+            "address1": pick["street_address"],
+            # address2: same as address1 with a small tweak (apt/lokal info)
+            "address2": f"{pick['street_address']} / {apartment}",
+            "country": "Poland",
+            "zipcode": pick["postcode"],
+            "state": pick["city"],  # Use city as region if API requires 'state'
+            "city": pick["city"],
+            "mobile_number": pick["phone_number"],
+        }
+
+    def users(self, count: int) -> List[dict]:
+        return [self.user() for _ in range(count)]
+
+
+_factory = Lazy(PayloadFactory)
+
+
+def get_payload_factory() -> PayloadFactory:
+    """Return the payload factory of the current worker process."""
+
+    return _factory.get()
+
+
+def user_create_payload() -> dict:
+    return get_payload_factory().user()
@@ -0,0 +1,122 @@
+"""Start slow fixture setup in the background before pytest asks for it.
+
+A UI test such as ``test_delete_account_via_ui_and_verify_api`` needs a browser
+session and an API account; set up one after the other, the test waits for the
+sum of both. ``tests/conftest.py`` submits the expensive parts of the fixtures a
+test uses as soon as the worker reaches the test, so they run concurrently, and
+the fixtures then :meth:`Prefetcher.take` the results: each test waits only on
+its slowest dependency.
+
+Every submitted job carries a ``discard`` callback that releases its result
+(checks the session back in, returns the account) if no fixture claims it, for
+example when the test is skipped.
+
+Tuning (all optional env vars):
+    PREFETCH          set to ``false`` to run fixture setup inline
+    PREFETCH_THREADS  background threads per worker (default 4)
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from utils.workers import Lazy, Stats, env_flag, env_int
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class PrefetchStats(Stats):
+    submitted: int = 0
+    claimed: int = 0
+    discarded: int = 0
+    waited: float = 0.0  # seconds fixtures still blocked on a prefetch
+
+    def summary(self) -> str:
+        return (
+            f"{self.submitted} prefetched, {self.claimed} claimed by fixtures, "
+            f"{self.discarded} discarded, {self.waited:.2f}s spent waiting on them"
+        )
+
+
+class Prefetcher:
+    def __init__(self, threads: Optional[int] = None):
+        self.enabled = env_flag("PREFETCH", True)
+        self._executor = ThreadPoolExecutor(
+            threads or env_int("PREFETCH_THREADS", 4), thread_name_prefix="prefetch"
+        )
+        self._lock = threading.Lock()
+        self._jobs: Dict[Hashable, Tuple[Future, Callable]] = {}
+        self._stats = PrefetchStats()
+
+    def submit(
+        self, key: Hashable, make: Callable, discard: Callable = lambda value: None
+    ) -> None:
+        """Start ``make()`` in the background unless ``key`` is already pending."""
+
+        if not self.enabled:
+            return
+        with self._lock:
+            if key in self._jobs:
+                return
+            self._jobs[key] = (self._executor.submit(make), discard)
+            self._stats.submitted += 1
+
+    def take(self, key: Hashable, make: Callable):
+        """Result of the prefetch for ``key`` (re-raising its error), or ``make()``."""
+
+        with self._lock:
+            job = self._jobs.pop(key, None)
+        if job is None:
+            return make()
+        future = job[0]
+        start = time.perf_counter()
+        try:
+            return future.result()
+        finally:
+            with self._lock:
+                self._stats.claimed += 1
+                self._stats.waited += time.perf_counter() - start
+
+    def discard(self, match: Callable[[Hashable], bool]) -> None:
+        """Release the results of unclaimed jobs whose key satisfies ``match``."""
+
+        with self._lock:
+            keys = [key for key in self._jobs if match(key)]
+            jobs = [self._jobs.pop(key) for key in keys]
+            self._stats.discarded += len(jobs)
+        for future, discard in jobs:
+            try:
+                discard(future.result())
+            except Exception as e:  # a failed prefetch has nothing to release
+                log.warning("Discarded prefetch failed: %s", e)
+
+    def close(self) -> None:
+        self.discard(lambda key: True)
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> PrefetchStats:
+        return self._stats
+
+
+_prefetcher = Lazy(Prefetcher)
+
+
+def get_prefetcher() -> Prefetcher:
+    """Return the prefetcher of the current worker process."""
+
+    return _prefetcher.get()
+
+
+def prefetch_stats() -> PrefetchStats:
+    prefetcher = _prefetcher.peek()
+    return prefetcher.stats() if prefetcher is not None else PrefetchStats()
+
+
+def close_prefetcher() -> None:
+    prefetcher = _prefetcher.peek()
+    if prefetcher is not None:
+        prefetcher.close()
@@ -0,0 +1,136 @@
+"""Indexed, in-memory view of ``/api/productsList``.
+
+The product list is the largest response the site serves. It comes from the
+response cache once per worker and is turned into compact ``__slots__``
+records, indexed for O(1) lookups:
+
+    catalog.get(1)                       by id
+    catalog.by_name("Blue  top")         by whitespace/case-normalized name
+    catalog.by_brand("Polo")             by brand
+    catalog.by_category("Tops", "Women") by category (and optionally usertype)
+
+UI helpers take expected names and prices from here instead of reading them
+from the page, and can cross-check what the page shows against the API.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from requests import Response
+
+from utils.api_requests import get_all_products
+from utils.workers import Lazy
+
+
+def normalize_name(name: str) -> str:
+    """Collapse whitespace and case, as product names differ between pages."""
+
+    return " ".join(str(name).split()).casefold()
+
+
+def parse_price(text: str) -> int:
+    """Parse a site price such as "Rs. 1,000" into 1000."""
+
+    return int(str(text).replace("Rs.", "").replace(",", "").strip())
+
+
+class Product:
+    __slots__ = ("id", "name", "price", "brand", "usertype", "category")
+
+    def __init__(
+        self, id: int, name: str, price: int, brand: str, usertype: str, category: str
+    ):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.brand = brand
+        self.usertype = usertype
+        self.category = category
+
+    @classmethod
+    def from_api(cls, raw: dict) -> "Product":
+        category = raw.get("category") or {}
+        return cls(
+            id=int(raw["id"]),
+            name=raw["name"],
+            price=parse_price(raw["price"]),
+            brand=raw.get("brand", ""),
+            usertype=(category.get("usertype") or {}).get("usertype", ""),
+            category=category.get("category", ""),
+        )
+
+    def __repr__(self) -> str:
+        return f"Product(id={self.id}, name={self.name!r}, price={self.price})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Product):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+
+class ProductCatalog:
+    def __init__(self, products: Iterable[Product] = ()):
+        self._by_id: Dict[int, Product] = {}
+        self._by_name: Dict[str, Product] = {}
+        self._by_brand: Dict[str, List[Product]] = {}
+        self._by_category: Dict[str, List[Product]] = {}
+        for product in products:
+            self.add(product)
+
+    @classmethod
+    def from_response(cls, response: Response) -> "ProductCatalog":
+        """Build the catalog from a loaded ``productsList`` response."""
+
+        return cls(Product.from_api(raw) for raw in response.json()["products"])
+
+    def add(self, product: Product) -> None:
+        self._by_id[product.id] = product
+        # Names are not unique on the site; the first (lowest id) one wins
+        self._by_name.setdefault(normalize_name(product.name), product)
+        self._by_brand.setdefault(product.brand.casefold(), []).append(product)
+        self._by_category.setdefault(product.category.casefold(), []).append(product)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Product]:
+        return iter(self._by_id.values())
+
+    def __contains__(self, product_id: int) -> bool:
+        return product_id in self._by_id
+
+    def get(self, product_id: Optional[int]) -> Optional[Product]:
+        # No id (e.g. a card without a details link) is no product, not an error
+        if product_id is None:
+            return None
+        try:
+            return self._by_id[int(product_id)]
+        except KeyError:
+            raise KeyError(f"No product with id {product_id} in the catalog")
+
+    def by_name(self, name: str) -> Product:
+        try:
+            return self._by_name[normalize_name(name)]
+        except KeyError:
+            raise KeyError(f"No product named {name!r} in the catalog")
+
+    def by_brand(self, brand: str) -> List[Product]:
+        return list(self._by_brand.get(brand.casefold(), []))
+
+    def by_category(
+        self, category: str, usertype: Optional[str] = None
+    ) -> List[Product]:
+        products = self._by_category.get(category.casefold(), [])
+        if usertype is not None:
+            products = [
+                p for p in products if p.usertype.casefold() == usertype.casefold()
+            ]
+        return list(products)
+
+
+_catalog = Lazy(lambda: ProductCatalog.from_response(get_all_products(cache=True)))
+
+
+def get_product_catalog() -> ProductCatalog:
+    """Return this process' catalog, built once from the (cached) product list."""
+
+    return _catalog.get()
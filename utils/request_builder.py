@@ -1,9 +1,21 @@
 import os
 from dataclasses import dataclass
 from enum import Enum
+from functools import partial
 from urllib.parse import urljoin
 
-from requests import Response, Session
+from requests import Response
+
+from utils.api_latency import CACHE, NETWORK, measure, note_response
+from utils.cassette import REPLAY, get_cassette
+from utils.response_cache import (
+    cache_enabled,
+    cache_key,
+    endpoint_ttl,
+    get_response_cache,
+)
+from utils.retry_policy import request_timeout, send_with_retries
+from utils.session_pool import get_session_pool
 
 
 class RequestMethod(str, Enum):
@@ -32,6 +44,9 @@ class Request:
         self._data = None
         self._cookies = None
         self._allow_redirects = True
+        self._cache = False
+        self._cache_ttl = None
+        self._live = False
 
     def json(self, json: dict) -> "Request":
         self._json = json
@@ -62,7 +77,7 @@ class Request:
         return self
 
     def cookies(self, **kwargs) -> "Request":
-        self._cookies = self._headers.update(**kwargs)
+        self._cookies = {**(self._cookies or {}), **kwargs}
         return self
 
     def path(self, path: str) -> "Request":
@@ -73,6 +88,24 @@ class Request:
         self._allow_redirects = allow
         return self
 
+    def cache(self, ttl: float = None) -> "Request":
+        """Serve GET responses from the shared TTL cache.
+
+        Without ``ttl`` the per-endpoint TTL from ``response_cache`` is used.
+        """
+        self._cache = True
+        self._cache_ttl = ttl
+        return self
+
+    def live(self) -> "Request":
+        """Always go to the network: no cassette, no response cache.
+
+        For requests that set up state a real browser then uses (a login
+        session, a cart), which a replayed answer would only pretend to set.
+        """
+        self._live = True
+        return self
+
     def _prepare_url(self) -> str:
         # Accept either full URL or domain only in ADDRESS
         if self._domain.startswith("http://") or self._domain.startswith("https://"):
@@ -81,18 +114,67 @@ class Request:
             base = f"https://{self._domain}"
         return urljoin(base, self._path)
 
+    def _describe(self) -> dict:
+        """Address-independent summary of the request, used to match cassettes."""
+        return {
+            "method": RequestMethod(self._method).value,
+            "path": self._path,
+            "params": self._params,
+            "body": self._json if self._data is None else self._data,
+        }
+
     def send(self) -> Response:
-        response = Session().request(
-            method=self._method,
-            url=self._prepare_url(),
-            headers=self._headers,
-            params=self._params,
-            cookies=self._cookies,
-            json=self._json,
-            data=self._data,
-            auth=self._auth,
-            timeout=30,
-            verify=False,
-            allow_redirects=self._allow_redirects,
+        cassette = None if self._live else get_cassette()
+        if cassette is not None:
+            # Record/replay must see every exchange, so it bypasses the cache
+            source = REPLAY if cassette.mode == REPLAY else NETWORK
+            send = partial(cassette.send, self._describe(), self._send)
+        elif (
+            self._cache
+            and not self._live
+            and self._method == RequestMethod.GET
+            and cache_enabled()
+        ):
+            key = cache_key(
+                self._method, self._prepare_url(), self._params, self._headers
+            )
+            ttl = self._cache_ttl or endpoint_ttl(self._path)
+            # Reported as a cache sample unless the cache goes to the network
+            source = CACHE
+            send = partial(get_response_cache().fetch, key, ttl, self._send)
+        else:
+            source, send = NETWORK, self._send
+        with measure(RequestMethod(self._method).value, self._path, source) as sample:
+            response = send()
+            sample.status = response.status_code
+        return response
+
+    def _send(self) -> Response:
+        # Transient failures are retried here, below the cache and cassette,
+        # instead of failing the test and rerunning it whole
+        return send_with_retries(
+            RequestMethod(self._method).value,
+            self._path,
+            self._prepare_url(),
+            self._send_once,
         )
+
+    def _send_once(self) -> Response:
+        # Connections come from the worker-wide keep-alive pool, so repeated
+        # calls to ADDRESS skip the TCP/TLS handshake.
+        with get_session_pool().session() as session:
+            response = session.request(
+                method=self._method,
+                url=self._prepare_url(),
+                headers=self._headers,
+                params=self._params,
+                cookies=self._cookies,
+                json=self._json,
+                data=self._data,
+                auth=self._auth,
+                timeout=request_timeout(),
+                verify=False,
+                allow_redirects=self._allow_redirects,
+            )
+        note_response(response)
         return response
@@ -0,0 +1,249 @@
+"""Opt-in TTL cache for idempotent GET responses sent through ``Request.send()``.
+
+Requests opt in with ``Request(...).cache()``; the wrappers of static catalog
+endpoints take ``cache=True`` (``get_all_products(cache=True)`` builds the
+``ProductCatalog``). Tests of those endpoints call them uncached, so they
+always see the server's answer.
+
+Two tiers, both LRU-bounded:
+    memory  per worker, at most ``API_CACHE_MEMORY_ENTRIES`` responses
+    disk    SQLite file under ``.qa_cache/http`` shared by every worker, at most
+            ``API_CACHE_MAX_BYTES`` of bodies; cleared when a pytest run starts
+            (:func:`clear_response_cache`), so no run sees a previous run's
+            responses
+
+Only successes are stored: HTTP 200 *and* a JSON body whose ``responseCode``
+is 200, since the site reports errors inside a 200.
+
+A miss takes a per-key file lock before going to the network, so when all
+workers ask for the catalog at once only one of them actually fetches it.
+Set ``API_CACHE=false`` to bypass the cache entirely.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from utils.workers import Lazy, Stats, cache_dir, env_flag, env_int, file_lock
+
+# Per-endpoint TTL in seconds for requests that opt in without an explicit TTL
+ENDPOINT_TTLS = {
+    "/api/productsList": 300,
+    "/api/brandsList": 300,
+}
+DEFAULT_TTL = 60
+
+
+def endpoint_ttl(path: Optional[str]) -> float:
+    return ENDPOINT_TTLS.get(path or "", DEFAULT_TTL)
+
+
+def cache_enabled() -> bool:
+    return env_flag("API_CACHE", True)
+
+
+@dataclass
+class CacheStats(Stats):
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        ratio = self.hits / total if total else 0.0
+        return (
+            f"{self.hits}/{total} hits ({ratio:.1%}; {self.memory_hits} memory, "
+            f"{self.disk_hits} disk), {self.evictions} evictions"
+        )
+
+
+def cache_key(method: str, url: str, params: Optional[dict], headers: dict) -> str:
+    raw = json.dumps(
+        [method, url, sorted((params or {}).items()), sorted(headers.items())],
+        default=str,
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def serialize_response(response: Response) -> tuple[str, bytes]:
+    meta = {
+        "status_code": response.status_code,
+        "headers": dict(response.headers),
+        "url": response.url,
+        "reason": response.reason,
+        "encoding": response.encoding,
+    }
+    return json.dumps(meta), response.content
+
+
+def deserialize_response(meta: str, body: bytes) -> Response:
+    data = json.loads(meta)
+    response = Response()
+    response.status_code = data["status_code"]
+    response.headers = CaseInsensitiveDict(data["headers"])
+    response.url = data["url"]
+    response.reason = data["reason"]
+    response.encoding = data["encoding"]
+    response.elapsed = timedelta(0)
+    response._content = body
+    response._content_consumed = True  # iter_content() must not touch .raw
+    return response
+
+
+def _cacheable(response: Response) -> bool:
+    # The site reports API errors as HTTP 200 with the real code in the body
+    if response.status_code != 200:
+        return False
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and body.get("responseCode") == 200
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        memory_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.path = path or cache_dir("http") / "responses.sqlite"
+        self.memory_entries = memory_entries or env_int("API_CACHE_MEMORY_ENTRIES", 128)
+        self.max_bytes = max_bytes or env_int("API_CACHE_MAX_BYTES", 64 * 1024**2)
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, tuple[float, str, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # --- Disk tier -----------------------------------------------------------
+    def _db(self) -> sqlite3.Connection:
+        # sqlite connections cannot be shared between threads
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, "
+                "expires REAL, accessed REAL, size INTEGER, meta TEXT, body BLOB)"
+            )
+            self._local.db = db
+        return db
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple[float, str, bytes]]:
+        db = self._db()
+        row = db.execute(
+            "SELECT expires, meta, body FROM responses WHERE key = ? AND expires > ?",
+            (key, now),
+        ).fetchone()
+        if row is not None:
+            with db:
+                db.execute(
+                    "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+                )
+        return row
+
+    def _disk_put(self, key: str, entry: tuple[float, str, bytes], now: float) -> None:
+        expires, meta, body = entry
+        db = self._db()
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, expires, now, len(body), meta, body),
+            )
+            db.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses")
+            overflow = total.fetchone()[0] - self.max_bytes
+            # Evict least recently used bodies until the size budget fits
+            for old_key, size in db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed"
+            ).fetchall():
+                if overflow <= 0:
+                    break
+                db.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                overflow -= size
+                self.stats.evictions += 1
+
+    # --- Memory tier ---------------------------------------------------------
+    def _memory_get(self, key: str, now: float):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry
+
+    def _memory_put(self, key: str, entry: tuple[float, str, bytes]) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Delete the disk tier (call before any worker opened it)."""
+
+        for suffix in ("", "-wal", "-shm"):
+            self.path.with_name(self.path.name + suffix).unlink(missing_ok=True)
+
+    # --- Public API ----------------------------------------------------------
+    def fetch(self, key: str, ttl: float, send: Callable[[], Response]) -> Response:
+        """Return a cached response for ``key`` or call ``send`` and store it."""
+
+        now = time.time()
+        entry = self._memory_get(key, now)
+        if entry is not None:
+            self.stats.memory_hits += 1
+            return deserialize_response(entry[1], entry[2])
+
+        with file_lock(cache_dir("http", "locks") / f"{key}.lock"):
+            entry = self._disk_get(key, now)
+            if entry is not None:
+                self.stats.disk_hits += 1
+            else:
+                self.stats.misses += 1
+                response = send()
+                if not _cacheable(response):
+                    return response
+                now = time.time()
+                entry = (now + ttl, *serialize_response(response))
+                self._disk_put(key, entry, now)
+        self._memory_put(key, entry)
+        return deserialize_response(entry[1], entry[2])
+
+
+_cache = Lazy(ResponseCache)
+
+
+def get_response_cache() -> ResponseCache:
+    return _cache.get()
+
+
+def clear_response_cache() -> None:
+    """Forget the responses cached on disk by earlier runs."""
+
+    ResponseCache().clear()
+
+
+def response_cache_stats() -> CacheStats:
+    cache = _cache.peek()
+    return cache.stats if cache is not None else CacheStats()
@@ -0,0 +1,338 @@
+"""Retries, backoff and a circuit breaker for network calls of ``Request.send()``.
+
+Retry policy per endpoint:
+    idempotent calls (GET/PUT, plus the read-only POSTs verifyLogin and
+    searchProduct) are retried on connection errors, timeouts and 5xx
+    non-idempotent calls (createAccount, deleteAccount, add_to_cart, other
+    POSTs) are retried only when the request provably never reached the
+    server (connection refused / connect timeout) or the server refused it
+    with 503
+
+Backoff is exponential with full jitter and honours ``Retry-After``. A retry
+budget caps retries at a fraction of all requests of the worker, so a
+struggling server is not hammered by every test at once.
+
+The circuit breaker is shared by all xdist workers through a state file per
+host under ``.qa_cache/circuit``: after ``API_BREAKER_THRESHOLD`` consecutive
+failures anywhere, every worker fails fast with :class:`CircuitOpenError` for
+``API_BREAKER_RESET`` seconds, then a single call probes the host again. The
+state belongs to one pytest run; :func:`clear_circuit_breakers` resets it when
+the next run starts.
+
+Tuning (all optional env vars):
+    API_RETRIES            attempts per call, including the first (default 3)
+    API_RETRY_BACKOFF      base backoff in seconds (default 0.5)
+    API_RETRY_BACKOFF_MAX  backoff cap in seconds (default 8)
+    API_RETRY_BUDGET       retries allowed per request sent (default 0.2)
+    API_BREAKER            set to ``false`` to disable the circuit breaker
+    API_BREAKER_THRESHOLD  consecutive failures that open it (default 5)
+    API_BREAKER_RESET      seconds it stays open before a probe (default 30)
+    API_CONNECT_TIMEOUT    seconds to wait for a connection (default 5)
+"""
+
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests import Response
+from urllib3.exceptions import NewConnectionError
+
+from utils.workers import (
+    Stats,
+    atomic_write,
+    cache_dir,
+    env_flag,
+    env_float,
+    env_int,
+    file_lock,
+)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Endpoints whose semantics differ from their HTTP method; a key ending in "/"
+# covers every path below it
+IDEMPOTENT_ENDPOINTS = {
+    "/api/verifyLogin": True,
+    "/api/searchProduct": True,
+    # A retried delete of an account that was already deleted answers 404
+    "/api/deleteAccount": False,
+    # A GET that changes state: a retry could add the product twice
+    "/add_to_cart/": False,
+}
+RETRY_STATUSES = {500, 502, 503, 504}
+READ_TIMEOUT = 30
+
+
+def request_timeout() -> tuple[float, float]:
+    """(connect, read) timeout for ``requests``; a dead host fails in seconds."""
+
+    return env_float("API_CONNECT_TIMEOUT", 5.0), READ_TIMEOUT
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while the host's breaker is open."""
+
+
+@dataclass
+class RetryStats(Stats):
+    retries: int = 0
+    recovered: int = 0
+    gave_up: int = 0
+    budget_exhausted: int = 0
+    breaker_trips: int = 0
+    fast_failures: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.retries} retries ({self.recovered} recovered, {self.gave_up} gave "
+            f"up, {self.budget_exhausted} over budget), {self.breaker_trips} breaker "
+            f"trips, {self.fast_failures} fast failures"
+        )
+
+
+_stats = RetryStats()
+_stats_lock = threading.Lock()
+
+
+def _count(field: str) -> None:
+    with _stats_lock:
+        setattr(_stats, field, getattr(_stats, field) + 1)
+
+
+def retry_stats() -> RetryStats:
+    return _stats
+
+
+def _never_sent(error: requests.RequestException) -> bool:
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def is_idempotent(method: str, path: Optional[str]) -> bool:
+    for endpoint, idempotent in IDEMPOTENT_ENDPOINTS.items():
+        if path == endpoint or (
+            endpoint.endswith("/") and path is not None and path.startswith(endpoint)
+        ):
+            return idempotent
+    return method in IDEMPOTENT_METHODS
+
+
+@dataclass
+class RetryPolicy:
+    idempotent: bool
+    max_attempts: int = 3
+    backoff: float = 0.5
+    backoff_max: float = 8.0
+
+    @classmethod
+    def for_endpoint(cls, method: str, path: Optional[str]) -> "RetryPolicy":
+        return cls(
+            idempotent=is_idempotent(method, path),
+            max_attempts=env_int("API_RETRIES", cls.max_attempts),
+            backoff=env_float("API_RETRY_BACKOFF", cls.backoff),
+            backoff_max=env_float("API_RETRY_BACKOFF_MAX", cls.backoff_max),
+        )
+
+    def retries_error(self, error: requests.RequestException) -> bool:
+        if _never_sent(error):
+            return True
+        return self.idempotent and isinstance(
+            error, (requests.ConnectionError, requests.Timeout)
+        )
+
+    def retries_status(self, status: int) -> bool:
+        if self.idempotent:
+            return status in RETRY_STATUSES
+        return status == 503
+
+    def delay(self, attempt: int, response: Optional[Response]) -> float:
+        retry_after = None
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        # Full jitter keeps workers that failed together from retrying together
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2**attempt))
+
+
+class RetryBudget:
+    """Allow ``ratio`` retries per request, plus a floor for quiet workers."""
+
+    def __init__(self, ratio: Optional[float] = None, min_retries: int = 10):
+        self.ratio = env_float("API_RETRY_BUDGET", 0.2) if ratio is None else ratio
+        self.min_retries = min_retries
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+
+    def on_request(self) -> None:
+        with self._lock:
+            self._requests += 1
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._retries >= self.min_retries + self.ratio * self._requests:
+                return False
+            self._retries += 1
+            return True
+
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        host: str,
+        threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+    ):
+        self.host = host
+        self.threshold = threshold or env_int("API_BREAKER_THRESHOLD", 5)
+        self.reset_timeout = reset_timeout or env_float("API_BREAKER_RESET", 30.0)
+        self.path = cache_dir("circuit") / f"{host.replace(':', '_')}.json"
+        self.lock_path = self.path.with_suffix(".lock")
+        self._version: Optional[tuple] = None
+        self._state = self._closed()
+
+    @staticmethod
+    def _closed() -> dict:
+        return {"state": CLOSED, "failures": 0, "opened_at": 0.0}
+
+    def _read(self) -> dict:
+        # Hot path: one stat() per request, the file is re-read only on change
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return self._closed()
+        # atomic_write swaps the inode, so this catches same-tick rewrites too
+        version = (stat.st_ino, stat.st_mtime_ns)
+        if version != self._version:
+            self._state, self._version = json.loads(self.path.read_text()), version
+        return self._state
+
+    @contextmanager
+    def _update(self) -> Iterator[dict]:
+        with file_lock(self.lock_path):
+            self._version = None
+            state = dict(self._read())
+            yield state
+            atomic_write(self.path, json.dumps(state).encode())
+
+    def _open_error(self, state: dict) -> CircuitOpenError:
+        _count("fast_failures")
+        wait = max(self.reset_timeout - (time.time() - state["opened_at"]), 0)
+        return CircuitOpenError(
+            f"{self.host} looks down after {state['failures']} consecutive failures; "
+            f"failing fast for another {wait:.0f}s"
+        )
+
+    def before_call(self) -> None:
+        state = self._read()
+        if state["state"] == CLOSED:
+            return
+        if time.time() - state["opened_at"] < self.reset_timeout:
+            raise self._open_error(state)
+        with self._update() as state:
+            # Exactly one caller probes the host once the cool-down passed;
+            # moving opened_at keeps everyone else failing fast meanwhile
+            if state["state"] == CLOSED:
+                return
+            if time.time() - state["opened_at"] >= self.reset_timeout:
+                state.update(state=HALF_OPEN, opened_at=time.time())
+                return
+        raise self._open_error(state)
+
+    def record_success(self) -> None:
+        state = self._read()
+        if state["state"] == CLOSED and not state["failures"]:
+            return
+        with self._update() as state:
+            state.update(self._closed())
+
+    def record_failure(self) -> None:
+        with self._update() as state:
+            state["failures"] += 1
+            tripped = state["state"] == HALF_OPEN or (
+                state["state"] == CLOSED and state["failures"] >= self.threshold
+            )
+            if tripped:
+                state.update(state=OPEN, opened_at=time.time())
+        if tripped:
+            _count("breaker_trips")
+
+
+def clear_circuit_breakers() -> None:
+    """Close every host's breaker (call before any worker sent a request)."""
+
+    for path in cache_dir("circuit").glob("*.json"):
+        path.unlink(missing_ok=True)
+
+
+_budget = RetryBudget()
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(url: str) -> Optional[CircuitBreaker]:
+    if not env_flag("API_BREAKER", True):
+        return None
+    host = urlparse(url).netloc
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+def send_with_retries(
+    method: str, path: Optional[str], url: str, send: Callable[[], Response]
+) -> Response:
+    """Call ``send`` under the endpoint's retry policy and the host's breaker."""
+
+    policy = RetryPolicy.for_endpoint(method, path)
+    breaker = get_circuit_breaker(url)
+    _budget.on_request()
+    attempt = 0
+    while True:
+        attempt += 1
+        if breaker is not None:
+            breaker.before_call()
+        response, error = None, None
+        try:
+            response = send()
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        failed = error is not None or response.status_code >= 500
+        if breaker is not None and failed:
+            breaker.record_failure()
+        elif breaker is not None:
+            breaker.record_success()
+        if not failed:
+            if attempt > 1:
+                _count("recovered")
+            return response
+
+        retry = (
+            policy.retries_error(error)
+            if error is not None
+            else policy.retries_status(response.status_code)
+        )
+        if retry and attempt >= policy.max_attempts:
+            _count("gave_up")
+            retry = False
+        elif retry and not _budget.withdraw():
+            _count("budget_exhausted")
+            retry = False
+        if not retry:
+            if error is not None:
+                raise error
+            return response
+        _count("retries")
+        time.sleep(policy.delay(attempt, response))
@@ -0,0 +1,174 @@
+"""Failure screenshots written off the test's critical path.
+
+``pytest_runtest_makereport`` used to call ``driver.save_screenshot`` for every
+failed or xfailed test and wait for the 2560x1440 PNG to be written. Now the
+hook only grabs the PNG bytes from the browser (that has to happen before the
+session moves on) and hashes them; a background thread writes the files:
+
+* ``tests/artifacts/shot-<hash>.png``: the screenshot as the browser sent it;
+* ``tests/artifacts/shot-<hash>.thumb.webp``: a thumbnail downscaled and
+  compressed with Pillow for the HTML report (PNG at the highest compression
+  level if the Pillow build has no WebP support).
+
+Files are named after the content hash, so identical screenshots (the same
+page failing in several tests, as in the xfail-heavy suites) are written once
+per run and shared by all reports.
+
+Tuning (all optional env vars):
+    SCREENSHOT_ASYNC        set to ``false`` to write screenshots inline
+    SCREENSHOT_THUMB_WIDTH  thumbnail width in pixels (default 600)
+    SCREENSHOT_QUALITY      WebP thumbnail quality, 1-100 (default 75)
+"""
+
+import hashlib
+import io
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+from utils.workers import Lazy, Stats, atomic_write, env_flag, env_int
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class ScreenshotStats(Stats):
+    captured: int = 0
+    deduplicated: int = 0
+    written: int = 0  # files, full images and thumbnails
+    bytes_written: int = 0
+    capture: float = 0.0  # seconds tests waited for the browser's PNG
+    write: float = 0.0  # seconds the writer thread spent in the background
+
+    def summary(self) -> str:
+        return (
+            f"{self.captured} captured ({self.deduplicated} duplicates), "
+            f"{self.written} files / {self.bytes_written / 1_000_000:.1f} MB written, "
+            f"{self.capture:.2f}s capturing in tests, "
+            f"{self.write:.2f}s writing in the background"
+        )
+
+
+def _thumbnail_format() -> str:
+    from PIL import features  # only needed once a test failed
+
+    return "webp" if features.check("webp") else "png"
+
+
+class ScreenshotWriter:
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.asynchronous = env_flag("SCREENSHOT_ASYNC", True)
+        self.thumb_width = env_int("SCREENSHOT_THUMB_WIDTH", 600)
+        self.quality = env_int("SCREENSHOT_QUALITY", 75)
+        self.thumb_format = _thumbnail_format()
+        self._lock = threading.Lock()
+        self._seen: set = set()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = ScreenshotStats()
+
+    def capture(self, driver) -> Tuple[Path, Path]:
+        """Screenshot ``driver``; return the (full image, thumbnail) paths.
+
+        The files may not exist until :meth:`close` returns.
+        """
+
+        start = time.perf_counter()
+        png = driver.get_screenshot_as_png()
+        digest = hashlib.sha256(png).hexdigest()[:16]
+        full = self.directory / f"shot-{digest}.png"
+        thumb = self.directory / f"shot-{digest}.thumb.{self.thumb_format}"
+        with self._lock:
+            self._stats.captured += 1
+            self._stats.capture += time.perf_counter() - start
+            # Another worker may have written the same image: files are shared
+            duplicate = digest in self._seen or full.exists()
+            self._seen.add(digest)
+            if duplicate:
+                self._stats.deduplicated += 1
+                return full, thumb
+        if self.asynchronous:
+            self._start()
+            self._queue.put((png, full, thumb))
+        else:
+            self._write(png, full, thumb)
+        return full, thumb
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="screenshot-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._write(*job)
+            except Exception as e:  # a lost screenshot must not fail the run
+                log.warning("Writing screenshot %s failed: %s", job[1], e)
+
+    def _write(self, png: bytes, full: Path, thumb: Path) -> None:
+        start = time.perf_counter()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = [(full, png), (thumb, self._thumbnail(png))]
+        for path, data in files:
+            atomic_write(path, data)
+        with self._lock:
+            self._stats.written += len(files)
+            self._stats.bytes_written += sum(len(data) for _, data in files)
+            self._stats.write += time.perf_counter() - start
+
+    def _thumbnail(self, png: bytes) -> bytes:
+        from PIL import Image
+
+        image = Image.open(io.BytesIO(png))
+        height = round(image.height * self.thumb_width / image.width)
+        image.thumbnail((self.thumb_width, max(height, 1)))
+        out = io.BytesIO()
+        if self.thumb_format == "webp":
+            image.save(out, "WEBP", quality=self.quality, method=4)
+        else:
+            image.save(out, "PNG", optimize=True, compress_level=9)
+        return out.getvalue()
+
+    def close(self) -> None:
+        """Wait until every queued screenshot is on disk."""
+
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def stats(self) -> ScreenshotStats:
+        return self._stats
+
+
+_writer = Lazy(ScreenshotWriter)
+
+
+def get_screenshot_writer(directory: Path) -> ScreenshotWriter:
+    """Return the screenshot writer of the current worker process."""
+
+    return _writer.get(directory)
+
+
+def screenshot_stats() -> ScreenshotStats:
+    writer = _writer.peek()
+    return writer.stats() if writer is not None else ScreenshotStats()
+
+
+def close_screenshot_writer() -> None:
+    writer = _writer.peek()
+    if writer is not None:
+        writer.close()
@@ -0,0 +1,219 @@
+"""Worker-scoped pool of keep-alive HTTP connections used by ``Request.send()``.
+
+A single :class:`requests.Session` is shared by every request made in the
+current process (one pytest-xdist worker), so consecutive API calls to
+``ADDRESS`` reuse open TCP/TLS connections instead of handshaking again.
+
+Tuning (all optional env vars):
+    HTTP_POOL_CONNECTIONS         number of hosts to keep pools for (default 4)
+    HTTP_POOL_MAXSIZE             open connections kept per host (default 16)
+    HTTP_KEEPALIVE_MAX_REQUESTS   recycle connections after N requests (0 = never)
+    HTTP_KEEPALIVE_IDLE_TIMEOUT   recycle connections idle longer than N seconds
+"""
+
+import http.cookiejar
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, Iterator, Optional
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from utils.api_latency import note_connect
+from utils.workers import Lazy, Stats, env_float, env_int
+
+
+@dataclass
+class PoolConfig:
+    pool_connections: int = 4
+    pool_maxsize: int = 16
+    max_requests: int = 0
+    idle_timeout: float = 60.0
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        return cls(
+            pool_connections=env_int("HTTP_POOL_CONNECTIONS", cls.pool_connections),
+            pool_maxsize=env_int("HTTP_POOL_MAXSIZE", cls.pool_maxsize),
+            max_requests=env_int("HTTP_KEEPALIVE_MAX_REQUESTS", cls.max_requests),
+            idle_timeout=env_float("HTTP_KEEPALIVE_IDLE_TIMEOUT", cls.idle_timeout),
+        )
+
+
+@dataclass
+class PoolStats(Stats):
+    requests: int = 0
+    connections: int = 0
+    recycles: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.connections, 0)
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.requests if self.requests else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requests over {self.connections} connections "
+            f"({self.reuse_ratio:.1%} reused, {self.recycles} recycles)"
+        )
+
+
+class _ConnectCounter:
+    """Count real TCP connects made by the sessions of one pool.
+
+    urllib3 silently reopens a dropped keep-alive socket inside the same
+    connection object, so counting ``connect()`` calls is the only reliable
+    way to see how many handshakes were actually paid for.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def increment(self) -> None:
+        with self._lock:
+            self.value += 1
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def __init__(self, *args, connects: _ConnectCounter, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._connects = connects
+
+    def connect(self):
+        self._connects.increment()
+        start = time.perf_counter()
+        super().connect()
+        note_connect(time.perf_counter() - start)
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def __init__(self, *args, connects: _ConnectCounter, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._connects = connects
+
+    def connect(self):
+        self._connects.increment()
+        start = time.perf_counter()
+        super().connect()
+        note_connect(time.perf_counter() - start)
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    def __init__(self, connects: _ConnectCounter, **kwargs):
+        self._connects = connects
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # Connection pools hand unknown keywords on to every connection they open
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": partial(_CountingHTTPConnectionPool, connects=self._connects),
+            "https": partial(_CountingHTTPSConnectionPool, connects=self._connects),
+        }
+
+
+class SessionPool:
+    """Thread-safe owner of the shared keep-alive session."""
+
+    def __init__(self, config: Optional[PoolConfig] = None):
+        self.config = config or PoolConfig.from_env()
+        self._lock = threading.Lock()
+        self._connects = _ConnectCounter()
+        self._session = None
+        # Requests in flight per session; a recycled session is closed by the
+        # last of them to finish
+        self._in_flight: Dict[Session, int] = {}
+        self._served = 0
+        self._requests = 0
+        self._recycles = 0
+        self._last_used = 0.0
+
+    def _new_session(self) -> Session:
+        session = Session()
+        # Requests are one-shot from the caller's point of view: never let
+        # cookies from one response leak into the next call.
+        session.cookies.set_policy(
+            http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+        )
+        adapter = _PooledAdapter(
+            self._connects,
+            pool_connections=self.config.pool_connections,
+            pool_maxsize=self.config.pool_maxsize,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        self._served = 0
+        return session
+
+    def _expired(self, now: float) -> bool:
+        if self.config.max_requests and self._served >= self.config.max_requests:
+            return True
+        idle = now - self._last_used
+        return bool(self.config.idle_timeout) and idle > self.config.idle_timeout
+
+    def _retire(self, session: Session) -> None:
+        # Called with the lock held
+        if not self._in_flight.get(session):
+            self._in_flight.pop(session, None)
+            session.close()
+
+    @contextmanager
+    def session(self) -> Iterator[Session]:
+        """Lend the shared session to one request; recycle it at keep-alive limits."""
+
+        with self._lock:
+            now = time.monotonic()
+            if self._session is None:
+                self._session = self._new_session()
+            elif self._expired(now):
+                retired, self._session = self._session, self._new_session()
+                self._recycles += 1
+                self._retire(retired)
+            session = self._session
+            self._in_flight[session] = self._in_flight.get(session, 0) + 1
+            self._served += 1
+            self._requests += 1
+            self._last_used = now
+        try:
+            yield session
+        finally:
+            with self._lock:
+                self._in_flight[session] -= 1
+                if session is not self._session:
+                    self._retire(session)
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(self._requests, self._connects.value, self._recycles)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                retired, self._session = self._session, None
+                self._retire(retired)
+
+
+_pool = Lazy(SessionPool)
+
+
+def get_session_pool() -> SessionPool:
+    """Return the pool of the current worker process, creating it lazily."""
+
+    return _pool.get()
@@ -0,0 +1,122 @@
+"""Opt-in import-time profile of pytest workers (``QA_STARTUP_PROFILE=1``).
+
+``tests/conftest.py`` imports this module before anything else. When the env
+var is set, a meta path finder wraps every module loader and times its
+``exec_module``, so the terminal summary can show which imports dominate the
+start of each xdist worker (cumulative time includes nested imports, self time
+does not). Plugins loaded by pytest before conftest are not covered; use
+``python -X importtime`` for those.
+
+Stdlib only: this module must stay cheap to import.
+"""
+
+import importlib.abc
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from utils.workers import env_flag
+
+
+class _TimingLoader(importlib.abc.Loader):
+    def __init__(self, loader, name: str, profile: "StartupProfile"):
+        self._loader = loader
+        self._name = name
+        self._profile = profile
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profile.enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profile.leave(self._name, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        # get_source, is_package, get_resource_reader, ... of the real loader
+        return getattr(self._loader, name)
+
+
+class StartupProfile(importlib.abc.MetaPathFinder):
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks: dict[str, float] = {}
+        self.modules: dict[str, tuple[float, float]] = {}  # name -> (cumulative, self)
+        self._local = threading.local()
+
+    def _stack(self) -> List[float]:
+        # Time spent in nested imports, per import in progress on this thread
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    # --- Finder ----------------------------------------------------------------
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                find = getattr(finder, "find_spec", None)
+                if finder is self or find is None:
+                    continue
+                spec = find(fullname, path, target)
+                if spec is not None:
+                    if hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimingLoader(spec.loader, fullname, self)
+                    return spec
+            return None
+        finally:
+            self._local.finding = False
+
+    # --- Timing ------------------------------------------------------------------
+    def enter(self) -> None:
+        self._stack().append(0.0)
+
+    def leave(self, name: str, elapsed: float) -> None:
+        stack = self._stack()
+        nested = stack.pop()
+        self.modules[name] = (elapsed, elapsed - nested)
+        if stack:
+            stack[-1] += elapsed
+
+    def mark(self, name: str) -> None:
+        """Remember when a startup phase (e.g. collection) finished."""
+
+        self.marks[name] = time.perf_counter() - self.started
+
+    def snapshot(self, top: int = 15) -> dict:
+        """Plain-dict summary, safe to ship through xdist ``workeroutput``."""
+
+        slowest = sorted(self.modules.items(), key=lambda kv: kv[1][0], reverse=True)
+        return {
+            "modules": len(self.modules),
+            "marks": {k: round(v * 1000, 1) for k, v in self.marks.items()},
+            "slowest_ms": [
+                (name, round(cum * 1000, 1), round(own * 1000, 1))
+                for name, (cum, own) in slowest[:top]
+            ],
+        }
+
+
+_profile: Optional[StartupProfile] = None
+
+
+def get_startup_profile() -> Optional[StartupProfile]:
+    return _profile
+
+
+def install_startup_profile() -> Optional[StartupProfile]:
+    global _profile
+    if _profile is None and env_flag("QA_STARTUP_PROFILE"):
+        _profile = StartupProfile()
+        sys.meta_path.insert(0, _profile)
+    return _profile
+
+
+install_startup_profile()
@@ -0,0 +1,230 @@
+"""Snapshot and restore a browser's storage state.
+
+Some setup is slow in the browser but boils down to a few cookies and web
+storage entries: consent given through ``ConsentPopup``, a logged-in user, a
+filled cart. :func:`capture` reads the cookies, ``localStorage`` and
+``sessionStorage`` of the open site into a :class:`StorageState`, which can be
+saved as JSON; :func:`open_with_state` opens a URL in any later session with
+that state already in place:
+
+* cookies are set with DevTools ``Network.setCookies`` before the page loads;
+* web storage is written by a script DevTools runs before the page's own
+  scripts (``Page.addScriptToEvaluateOnNewDocument``), removed right after the
+  page loaded, so the next navigation is untouched.
+
+Browsers without DevTools get the state through a request to the site's
+``robots.txt`` first, ``add_cookie`` and ``execute_script``.
+
+``driver_on_address`` keeps the consent state in
+``.qa_cache/storage/consent-<host>.json``: the first session accepts the popup
+and saves what that changed (:meth:`StorageState.changes_since`, so no session
+cookie is shared), every later session starts with consent given and skips
+the up to 5 s wait for the button. If the popup shows up anyway, the snapshot
+is replaced by what accepting it changes this time.
+
+Tuning (all optional env vars):
+    STORAGE_STATE       set to ``false`` to not use the consent snapshot
+    STORAGE_STATE_TTL   maximum snapshot age in seconds (default 86400)
+"""
+
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+from utils.network_blocking import cdp
+from utils.workers import atomic_write, cache_dir, env_flag, env_int
+
+log = logging.getLogger(__name__)
+
+_READ_STORAGE = """
+const dump = (storage) => Object.fromEntries(
+    Array.from({length: storage.length}, (_, i) => storage.key(i))
+        .map((key) => [key, storage.getItem(key)]));
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+# Runs in every frame of every new document until removed; only the top frame
+# of the snapshot's origin is written
+_WRITE_STORAGE = """
+(function (origin, local, session) {{
+    if (window !== window.top || window.location.origin !== origin) return;
+    for (const [key, value] of Object.entries(local)) localStorage.setItem(key, value);
+    for (const [key, value] of Object.entries(session)) sessionStorage.setItem(key, value);
+}})({origin}, {local}, {session});
+"""
+
+
+@dataclass
+class StorageState:
+    origin: str
+    cookies: List[dict] = field(default_factory=list)
+    local: Dict[str, str] = field(default_factory=dict)
+    session: Dict[str, str] = field(default_factory=dict)
+    created: float = field(default_factory=time.time)
+
+    def changes_since(self, before: "StorageState") -> "StorageState":
+        """The cookies and entries that are new or different since ``before``."""
+
+        old_cookies = {(c["name"], c.get("domain")): c["value"] for c in before.cookies}
+        return StorageState(
+            origin=self.origin,
+            cookies=[
+                c
+                for c in self.cookies
+                if old_cookies.get((c["name"], c.get("domain"))) != c["value"]
+            ],
+            local={k: v for k, v in self.local.items() if before.local.get(k) != v},
+            session={
+                k: v for k, v in self.session.items() if before.session.get(k) != v
+            },
+        )
+
+    def empty(self) -> bool:
+        return not (self.cookies or self.local or self.session)
+
+    def expires(self) -> Optional[float]:
+        """Earliest cookie expiry (seconds since the epoch), None if none expires."""
+
+        return min((c["expiry"] for c in self.cookies if "expiry" in c), default=None)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, json.dumps(asdict(self), indent=1).encode())
+
+    @classmethod
+    def load(
+        cls, path: Path, max_age: Optional[float] = None
+    ) -> Optional["StorageState"]:
+        """The snapshot in ``path``; None if missing, unreadable or stale."""
+
+        try:
+            state = cls(**json.loads(path.read_text()))
+        except (OSError, ValueError, TypeError):
+            return None
+        now = time.time()
+        if max_age is not None and now - state.created > max_age:
+            return None
+        expires = state.expires()
+        if expires is not None and expires < now:
+            return None
+        return state
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def capture(driver) -> StorageState:
+    """Cookies and web storage of the site open in ``driver``."""
+
+    storage = driver.execute_script(_READ_STORAGE)
+    return StorageState(
+        origin=_origin(driver.current_url),
+        cookies=driver.get_cookies(),
+        local=storage["local"],
+        session=storage["session"],
+    )
+
+
+def _devtools_cookie(cookie: dict) -> dict:
+    data = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie.get("domain"),
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    if "sameSite" in cookie:
+        data["sameSite"] = cookie["sameSite"]
+    if "expiry" in cookie:
+        data["expires"] = cookie["expiry"]
+    return {key: value for key, value in data.items() if value is not None}
+
+
+def open_with_state(driver, url: str, state: StorageState) -> None:
+    """``driver.get(url)`` with ``state`` in place before the page's scripts run."""
+
+    try:
+        script = _prepare_with_devtools(driver, state)
+    except Exception as e:  # not Chromium
+        log.info("Restoring storage through DevTools failed (%s), using the page", e)
+        _open_with_page(driver, url, state)
+        return
+    try:
+        driver.get(url)
+    finally:
+        if script is not None:
+            cdp(
+                driver,
+                "Page.removeScriptToEvaluateOnNewDocument",
+                {"identifier": script},
+            )
+
+
+def _prepare_with_devtools(driver, state: StorageState) -> Optional[str]:
+    """Set the cookies; return the id of the storage script, if one is needed."""
+
+    if state.cookies:
+        cookies = [_devtools_cookie(c) for c in state.cookies]
+        cdp(driver, "Network.setCookies", {"cookies": cookies})
+    if not (state.local or state.session):
+        return None
+    source = _WRITE_STORAGE.format(
+        origin=json.dumps(state.origin),
+        local=json.dumps(state.local),
+        session=json.dumps(state.session),
+    )
+    return cdp(driver, "Page.addScriptToEvaluateOnNewDocument", {"source": source})[
+        "identifier"
+    ]
+
+
+def _open_with_page(driver, url: str, state: StorageState) -> None:
+    driver.get(urljoin(state.origin, "/robots.txt"))  # cheapest page of the site
+    for cookie in state.cookies:
+        driver.add_cookie(cookie)
+    driver.execute_script(
+        "for (const [k, v] of Object.entries(arguments[0])) localStorage.setItem(k, v);"
+        "for (const [k, v] of Object.entries(arguments[1])) sessionStorage.setItem(k, v);",
+        state.local,
+        state.session,
+    )
+    driver.get(url)
+
+
+# ---- Consent snapshot -------------------------------------------------------------
+
+
+def consent_snapshot_path(url: str) -> Path:
+    host = urlsplit(url).netloc.replace(":", "_")
+    return cache_dir("storage") / f"consent-{host}.json"
+
+
+def load_consent_snapshot(url: str) -> Optional[StorageState]:
+    if not env_flag("STORAGE_STATE", True):
+        return None
+    max_age = env_int("STORAGE_STATE_TTL", 86400)
+    return StorageState.load(consent_snapshot_path(url), max_age=max_age)
+
+
+def invalidate_consent_snapshot(url: str) -> None:
+    """Drop a snapshot the site no longer honours."""
+
+    consent_snapshot_path(url).unlink(missing_ok=True)
+
+
+def save_consent_snapshot(url: str, before: StorageState, after: StorageState) -> None:
+    """Keep what accepting the consent popup changed, for later sessions."""
+
+    if not env_flag("STORAGE_STATE", True):
+        return
+    changes = after.changes_since(before)
+    if changes.empty():
+        log.warning("Accepting consent changed no cookie or storage: not saved")
+        return
+    changes.save(consent_snapshot_path(url))
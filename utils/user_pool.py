@@ -0,0 +1,295 @@
+"""Pool of pre-created API accounts shared by every xdist worker.
+
+Accounts live in a JSON lease store under the shared cache dir (one store per
+``ADDRESS`` host), guarded by a file lock. A worker checks an account out,
+uses it, and checks it back in; the account is reset through
+``update_account`` and becomes free for the next worker. Accounts are kept
+for later runs; the first checkout of a run logs a carried-over account in,
+so accounts deleted on the site (or lost with a restarted stub server) are
+dropped instead of handed out, and ``USER_POOL_MAX_AGE`` retires old ones.
+
+Tuning (all optional env vars):
+    USER_POOL            set to ``false`` to create/delete a user per session
+    USER_POOL_SIZE       free accounts to keep ready (default: what the run needs)
+    USER_POOL_LEASE_TTL  seconds before an unreturned lease is reclaimed
+    USER_POOL_MAX_AGE    seconds before a pooled account is deleted and replaced
+    USER_POOL_KEEP       set to ``false`` to delete free accounts after the run
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from pathlib import Path
+from typing import Iterator, List, Optional
+from urllib.parse import urlparse
+
+from utils.api_requests import (
+    create_account,
+    create_accounts,
+    delete_accounts,
+    update_account,
+    verify_login_valid,
+)
+from utils.cassette import get_cassette
+from utils.payloads import get_payload_factory, user_create_payload
+from utils.workers import (
+    Lazy,
+    atomic_write,
+    cache_dir,
+    env_flag,
+    env_int,
+    file_lock,
+    worker_id,
+)
+
+FREE = "free"
+LEASED = "leased"
+
+# How long a checkout waits for accounts another worker is creating
+REPLENISH_WAIT = 30.0
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{worker_id()}"
+
+
+def _run_id() -> str:
+    # Shared by every worker of one pytest-xdist run
+    return os.environ.get("PYTEST_XDIST_TESTRUNUID") or _owner()
+
+
+def _owner_alive(owner: str) -> bool:
+    host, pid, _ = owner.split(":", 2)
+    if host != socket.gethostname():
+        return True  # cannot tell; the lease TTL decides instead
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _usable(user: dict) -> bool:
+    """Whether the site still accepts the account's credentials."""
+
+    resp = verify_login_valid(user["email"], user["password"])
+    return resp.json().get("responseCode") == HTTPStatus.OK
+
+
+class UserPool:
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        size: Optional[int] = None,
+        lease_ttl: Optional[int] = None,
+        max_age: Optional[int] = None,
+    ):
+        if path is None:
+            host = urlparse(os.environ.get("ADDRESS", "")).netloc or "default"
+            path = cache_dir("user_pool") / f"{host}.json"
+        self.path = path
+        self.lock_path = path.with_suffix(".lock")
+        self.size = size or env_int("USER_POOL_SIZE", 0)
+        self.lease_ttl = lease_ttl or env_int("USER_POOL_LEASE_TTL", 30 * 60)
+        self.max_age = max_age or env_int("USER_POOL_MAX_AGE", 7 * 24 * 3600)
+        self._maintainer: Optional[threading.Thread] = None
+
+    # --- Store ----------------------------------------------------------------
+    @contextmanager
+    def _store(self) -> Iterator[dict]:
+        """Yield the lease store under the lock and save it on exit."""
+
+        with file_lock(self.lock_path):
+            store = {"accounts": {}, "pending": {}}
+            if self.path.exists():
+                store = json.loads(self.path.read_text())
+            yield store
+            atomic_write(self.path, json.dumps(store, indent=1).encode())
+
+    # --- Leasing ----------------------------------------------------------------
+    def checkout(self) -> dict:
+        """Lease a free account; create one on the spot if none is coming."""
+
+        deadline = time.monotonic() + REPLENISH_WAIT
+        while True:
+            now = time.time()
+            with self._store() as store:
+                free = [e for e, a in store["accounts"].items() if a["state"] == FREE]
+                pending = sum(store["pending"].values())
+                if free:
+                    entry = store["accounts"][free[0]]
+                    entry.update(state=LEASED, owner=_owner(), leased_at=now)
+                    user, seen = entry["user"], entry.get("run") == _run_id()
+            if not free:
+                coming = pending or self._maintaining()
+                if not coming or time.monotonic() > deadline:
+                    break
+                time.sleep(0.2)  # accounts are being created for this run
+                continue
+            # Accounts made or returned in this run are known to be alive
+            if seen or _usable(user):
+                return user
+            self.discard(user)  # deleted on the site since it was pooled
+
+        user = user_create_payload()
+        create_account(user)
+        with self._store() as store:
+            store["accounts"][user["email"]] = {
+                "user": user,
+                "state": LEASED,
+                "owner": _owner(),
+                "leased_at": now,
+                "created_at": now,
+                "run": _run_id(),
+            }
+        return user
+
+    def checkin(self, user: dict) -> None:
+        """Reset the account to its pooled payload and mark it free again."""
+
+        resp = update_account(user)
+        # The update needs the account's credentials, so it doubles as a login
+        usable = resp.json().get("responseCode") == HTTPStatus.OK
+        with self._store() as store:
+            entry = store["accounts"].get(user["email"])
+            if entry is None:
+                return
+            if usable:
+                entry.update(state=FREE, owner=None, leased_at=None, run=_run_id())
+            else:
+                del store["accounts"][user["email"]]
+
+    def discard(self, user: dict) -> None:
+        """Forget an account the test consumed (e.g. deleted through the UI)."""
+
+        with self._store() as store:
+            store["accounts"].pop(user["email"], None)
+
+    # --- Maintenance ------------------------------------------------------------
+    def replenish(self, demand: int) -> None:
+        """Create enough accounts for ``demand`` concurrent leases.
+
+        ``USER_POOL_SIZE`` overrides the demand. Accounts leased right now
+        count towards it: they come back when their test session ends.
+        """
+
+        owner = _owner()
+        target = self.size or demand
+        with self._store() as store:
+            available = len(store["accounts"]) + sum(store["pending"].values())
+            needed = target - available
+            if needed <= 0:
+                return
+            # Reserve the slots so other workers do not create them too
+            store["pending"][owner] = store["pending"].get(owner, 0) + needed
+
+        users = get_payload_factory().users(needed)
+        results = create_accounts(users)
+        now = time.time()
+        with self._store() as store:
+            left = store["pending"].pop(owner, 0) - needed
+            if left > 0:
+                store["pending"][owner] = left
+            for user, result in zip(users, results):
+                if result.ok:
+                    store["accounts"][user["email"]] = {
+                        "user": user,
+                        "state": FREE,
+                        "owner": None,
+                        "leased_at": None,
+                        "created_at": now,
+                        "run": _run_id(),
+                    }
+
+    def maintain_in_background(self, demand: int) -> None:
+        """Garbage-collect, then replenish for ``demand``, on a daemon thread."""
+
+        if self._maintaining():
+            return
+
+        def maintain():
+            self.collect_garbage()
+            self.replenish(demand)
+
+        self._maintainer = threading.Thread(
+            target=maintain, name="user-pool-maintenance", daemon=True
+        )
+        self._maintainer.start()
+
+    def _maintaining(self) -> bool:
+        return self._maintainer is not None and self._maintainer.is_alive()
+
+    def wait_for_maintenance(self, timeout: Optional[float] = None) -> None:
+        """Let in-flight account creation finish so no account goes unrecorded."""
+
+        if self._maintainer is not None:
+            self._maintainer.join(timeout)
+
+    def collect_garbage(self) -> None:
+        """Reclaim orphaned leases and retire accounts past ``max_age``.
+
+        A lease is orphaned when its owner process is gone or it outlived the
+        lease TTL. Orphans are reset before they are handed out again.
+        """
+
+        now = time.time()
+        orphans, expired = [], []
+        with self._store() as store:
+            # A crashed replenisher never releases its reservation
+            for owner in [o for o in store["pending"] if not _owner_alive(o)]:
+                del store["pending"][owner]
+            for email, entry in list(store["accounts"].items()):
+                if now - entry["created_at"] > self.max_age:
+                    if entry["state"] == FREE:
+                        expired.append(entry["user"])
+                        del store["accounts"][email]
+                elif entry["state"] == LEASED and (
+                    now - entry["leased_at"] > self.lease_ttl
+                    or not _owner_alive(entry["owner"])
+                ):
+                    entry.update(owner=_owner(), leased_at=now)
+                    orphans.append(entry["user"])
+        for user in orphans:
+            self.checkin(user)
+        delete_accounts(expired)
+
+    def drain(self) -> List[dict]:
+        """Delete every free account from the site and the store."""
+
+        with self._store() as store:
+            users = [
+                a["user"] for a in store["accounts"].values() if a["state"] == FREE
+            ]
+            for user in users:
+                del store["accounts"][user["email"]]
+        delete_accounts(users)
+        return users
+
+
+_pool = Lazy(UserPool)
+
+
+def user_pool_enabled() -> bool:
+    # Pool leases mirror real accounts on the site, which a replayed or
+    # recorded run must not touch
+    return env_flag("USER_POOL", True) and get_cassette() is None
+
+
+def get_user_pool() -> UserPool:
+    """Return the process-wide pool for the current ``ADDRESS``."""
+
+    return _pool.get()
+
+
+def close_user_pool(timeout: float = 60) -> None:
+    """Wait for background maintenance of this process, if it was started."""
+
+    pool = _pool.peek()
+    if pool is not None:
+        pool.wait_for_maintenance(timeout)
@@ -0,0 +1,136 @@
+"""Helpers describing the current pytest-xdist worker process.
+
+Every xdist worker is a separate Python process, so module-level state in
+``utils`` is naturally worker-scoped. These helpers give that state a name.
+"""
+
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import fields
+from pathlib import Path
+from typing import Callable, Generic, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def worker_id() -> str:
+    """Return the xdist worker id (``gw0``, ``gw1``, ...) or ``master``."""
+
+    return os.environ.get("PYTEST_XDIST_WORKER", "master")
+
+
+def current_test() -> tuple[str, str]:
+    """Return ``(nodeid, phase)`` of the running test, or empty strings.
+
+    "tests/api/test_x.py::test_y (call)" -> ("tests/api/test_x.py::test_y", "call")
+    """
+
+    current = os.environ.get("PYTEST_CURRENT_TEST", "")
+    nodeid, _, phase = current.rpartition(" ")
+    return nodeid, phase.strip("()")
+
+
+def cache_dir(*parts: str) -> Path:
+    """Return (and create) a directory under the cache shared by all workers.
+
+    Defaults to ``.qa_cache`` in the repo root; override with ``QA_CACHE_DIR``.
+    """
+
+    root = Path(os.environ.get("QA_CACHE_DIR") or REPO_ROOT / ".qa_cache")
+    path = root.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on ``path`` shared by every worker process."""
+
+    with open(path, "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Replace ``path`` in one step so other workers never read a torn file."""
+
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean env var the same way ``HEADLESS`` is read in conftest."""
+
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer env var, falling back to ``default`` when unset."""
+
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float env var, falling back to ``default`` when unset."""
+
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+class Lazy(Generic[T]):
+    """A per-process object built on first use, safely across threads.
+
+    ``factory`` receives the arguments of the first :meth:`get` call.
+    """
+
+    def __init__(self, factory: Callable[..., T]):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+
+    def get(self, *args) -> T:
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._factory(*args)
+        return self._value
+
+    def peek(self) -> Optional[T]:
+        """The object if it was built, without building it."""
+
+        return self._value
+
+
+class Stats:
+    """Base of the counter dataclasses each worker ships to the controller.
+
+    Workers' copies add up field by field; :meth:`as_dict` is what crosses
+    the process boundary and ``cls(**as_dict())`` rebuilds it.
+    """
+
+    def __add__(self, other):
+        return type(self)(
+            *(getattr(self, f.name) + getattr(other, f.name) for f in fields(self))
+        )
+
+    def as_dict(self) -> dict:
+        values = {f.name: getattr(self, f.name) for f in fields(self)}
+        return {
+            name: round(value, 3) if isinstance(value, float) else value
+            for name, value in values.items()
+        }
+
+    def summary(self) -> str:
+        raise NotImplementedError
@@ -0,0 +1,143 @@
+"""xdist scheduling that keeps tests sharing expensive fixtures on one worker.
+
+With ``--xdist-schedule affinity`` tests are grouped by the expensive fixtures
+they use (``driver``/``driver_on_address`` and each ``user_api`` variant).
+Every group is cut into chunks of at most one worker's share of the run and
+each chunk runs on a single worker, so a worker's pooled browser session (and
+session-scoped account) serves a whole chunk while the chunking still spreads
+large groups over several workers. Tests without such fixtures are scheduled
+one by one, as with ``--dist load``, and fill the gaps.
+
+Chunk sizes and the order in which work is handed out come from the duration
+history (``utils/duration_history.py``): chunks hold about equal expected
+time, and the longest unit left is always handed out next. Tests without
+history count as the median test. ``--xdist-schedule duration`` does the
+longest-first part alone, one test per unit.
+
+The controller does not collect tests itself, so workers write the fixtures
+of every collected test to ``.qa_cache/xdist/fixtures-<run>.json`` during
+collection (:func:`write_fixture_map`) and the scheduler reads it once all
+collections are in. Without the file every test is its own unit.
+"""
+
+import json
+import math
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from xdist.scheduler import LoadScopeScheduling
+
+from utils.duration_history import get_duration_history
+from utils.workers import atomic_write, cache_dir
+
+# Fixtures whose setup is worth sharing between consecutive tests
+AFFINITY_FIXTURES = ("driver", "user_api")
+
+
+def fixture_map_path(testrunuid: str) -> Path:
+    return cache_dir("xdist") / f"fixtures-{testrunuid}.json"
+
+
+def ensure_testrunuid(config) -> None:
+    """Fix the run id on the controller so the scheduler can find the map."""
+
+    if config.getoption("testrunuid") is None:
+        config.option.testrunuid = uuid.uuid4().hex
+
+
+def affinity_key(item) -> Optional[str]:
+    """Name of the expensive-fixture group of ``item``, None if it has none."""
+
+    parts = []
+    for name in AFFINITY_FIXTURES:
+        if name not in item.fixturenames:
+            continue
+        callspec = getattr(item, "callspec", None)
+        if callspec is not None and name in callspec.params:
+            # Indirectly parametrized: every param is a separate instance
+            parts.append(f"{name}[{callspec.params[name]}]")
+        else:
+            parts.append(name)
+    return "+".join(parts) or None
+
+
+def write_fixture_map(config, items) -> None:
+    """Called on each worker after collection; all workers write the same map."""
+
+    testrunuid = config.workerinput["testrunuid"]
+    keys = {item.nodeid: affinity_key(item) for item in items}
+    atomic_write(fixture_map_path(testrunuid), json.dumps(keys).encode())
+
+
+class AffinityScheduling(LoadScopeScheduling):
+    # DurationScheduling turns the fixture grouping off
+    affinity = True
+
+    def __init__(self, config, log=None):
+        super().__init__(config, log)
+        self._scopes: Dict[str, str] = {}
+        self._costs: Dict[str, float] = {}  # expected seconds per scope
+
+    def _split_scope(self, nodeid: str) -> str:
+        return self._scopes.get(nodeid, nodeid)
+
+    def _load_keys(self) -> Dict[str, Optional[str]]:
+        path = fixture_map_path(self.config.getoption("testrunuid"))
+        try:
+            keys = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.log("No fixture map at", path, "- scheduling test by test")
+            return {}
+        path.unlink(missing_ok=True)
+        return keys
+
+    def _assign_scopes(self, collection: List[str]) -> None:
+        history = get_duration_history()
+        weights = history.weights(collection)
+        keys = self._load_keys() if self.affinity else {}
+        # One worker's fair share of the run; no chunk grows beyond it
+        share = sum(weights.values()) / max(len(self.nodes), 1)
+        groups: Dict[str, List[str]] = {}
+        for nodeid in collection:
+            key = keys.get(nodeid)
+            if key is None:
+                self._costs[nodeid] = weights[nodeid]
+            else:
+                groups.setdefault(key, []).append(nodeid)
+        for key, nodeids in groups.items():
+            total = sum(weights[n] for n in nodeids)
+            count = min(max(1, math.ceil(total / share)), len(nodeids))
+            # Contiguous chunks of about equal cost: 7 equal tests in 3 chunks
+            # are split 2, 3, 2 instead of 3, 3, 1
+            done = 0.0
+            for nodeid in nodeids:
+                index = min(
+                    int((done + weights[nodeid] / 2) * count / total), count - 1
+                )
+                done += weights[nodeid]
+                scope = f"{key}#{index}"
+                self._scopes[nodeid] = scope
+                if scope not in self._costs and "driver" in key:
+                    # Each chunk may start a browser session on its worker
+                    self._costs[scope] = history.fixture_cost("driver")
+                self._costs[scope] = self._costs.get(scope, 0.0) + weights[nodeid]
+
+    def _assign_work_unit(self, node) -> None:
+        # Longest expected unit first, so slow tests never start last and
+        # keep one worker busy while the others are idle
+        scope = max(self.workqueue, key=lambda s: self._costs.get(s, 0.0))
+        self.workqueue.move_to_end(scope, last=False)
+        super()._assign_work_unit(node)
+
+    def schedule(self) -> None:
+        if self.collection is None and self.collection_is_completed:
+            collection = next(iter(self.registered_collections.values()), [])
+            self._assign_scopes(collection)
+        super().schedule()
+
+
+class DurationScheduling(AffinityScheduling):
+    """One test per unit, longest expected duration first."""
+
+    affinity = False